@@ -0,0 +1,248 @@
+import json
+import mmap
+import os
+import threading
+import time
+from typing import Dict, List, Tuple, Union
+
+import aiohttp
+import requests
+
+import util
+from DLSite_Cache import CacheEntry
+from DLSite_Transport import DLSite_Transport, build_response
+
+SEGMENT_NAME = "segment-{:05d}.dat"
+INDEX_NAME = "index.jsonl"
+
+
+class DLSite_ArchiveWriter:
+    """
+    Append responses to size-capped segment files of `directory` with a JSON lines offset index.
+    Each segment record is a JSON header line followed by the raw body and a newline,
+    so the index can be rebuilt from the segments alone.
+    """
+
+    def __init__(self, directory: str, max_segment_size: int = 1 << 30) -> None:
+        self.directory = directory
+        self.max_segment_size = max_segment_size
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._segment = len(_list_segments(directory))
+        if self._segment:
+            self._segment -= 1
+        self._segment_file = open(self._segment_path(self._segment), "ab")
+        self._index_file = open(os.path.join(directory, INDEX_NAME), "a", encoding="utf-8")
+
+    def append(
+        self,
+        key: str,
+        url: str,
+        status: int,
+        content: bytes,
+        content_type: str = "",
+        etag: str = "",
+        last_modified: str = "",
+    ):
+        header = {
+            "key": key,
+            "url": url,
+            "status": status,
+            "content_type": content_type,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+            "length": len(content),
+        }
+        header_line = json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n"
+        with self._lock:
+            if self._segment_file.tell() >= self.max_segment_size:
+                self._segment_file.close()
+                self._segment += 1
+                self._segment_file = open(self._segment_path(self._segment), "ab")
+            offset = self._segment_file.tell() + len(header_line)
+            self._segment_file.write(header_line)
+            self._segment_file.write(content)
+            self._segment_file.write(b"\n")
+            header.update({"segment": self._segment, "offset": offset})
+            self._index_file.write(json.dumps(header, ensure_ascii=False) + "\n")
+
+    def append_response(self, key: str, resp: requests.Response):
+        self.append(
+            key,
+            resp.url,
+            resp.status_code,
+            resp.content,
+            content_type=resp.headers.get("Content-Type", ""),
+            etag=resp.headers.get("ETag", ""),
+            last_modified=resp.headers.get("Last-Modified", ""),
+        )
+
+    def flush(self):
+        with self._lock:
+            self._segment_file.flush()
+            self._index_file.flush()
+
+    def close(self):
+        with self._lock:
+            self._segment_file.close()
+            self._index_file.close()
+
+    def __enter__(self) -> "DLSite_ArchiveWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, SEGMENT_NAME.format(segment))
+
+
+def _list_segments(directory: str) -> List[str]:
+    return sorted(
+        name
+        for name in os.listdir(directory)
+        if name.startswith("segment-") and name.endswith(".dat")
+    )
+
+
+def rebuild_index(directory: str):
+    """
+    Write index of `directory` again by scanning its segments.
+    """
+    with open(os.path.join(directory, INDEX_NAME), "w", encoding="utf-8") as index_file:
+        for name in _list_segments(directory):
+            segment = int(name[len("segment-") : -len(".dat")])
+            with open(os.path.join(directory, name), "rb") as f:
+                while True:
+                    header_line = f.readline()
+                    if not header_line:
+                        break
+                    header = json.loads(header_line)
+                    header.update({"segment": segment, "offset": f.tell()})
+                    index_file.write(json.dumps(header, ensure_ascii=False) + "\n")
+                    f.seek(header["length"] + 1, os.SEEK_CUR)
+
+
+class DLSite_ArchiveReader:
+    """
+    Read responses of an archive written by `DLSite_ArchiveWriter` through memory-mapped segments.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        # Latest record of a key wins
+        self.index: Dict[str, Tuple[int, int, int, tuple]] = {}
+        with open(os.path.join(directory, INDEX_NAME), encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                h = json.loads(line)
+                meta = (h["url"], h["status"], h["content_type"], h["etag"], h["last_modified"], h["fetched_at"])
+                self.index[h["key"]] = (h["segment"], h["offset"], h["length"], meta)
+
+        self._files = []
+        self._maps: Dict[int, mmap.mmap] = {}
+        for name in _list_segments(directory):
+            segment = int(name[len("segment-") : -len(".dat")])
+            f = open(os.path.join(directory, name), "rb")
+            self._files.append(f)
+            if os.fstat(f.fileno()).st_size:
+                self._maps[segment] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def get(self, key: str) -> Union[CacheEntry, None]:
+        item = self.index.get(key)
+        if item is None:
+            return None
+        segment, offset, length, meta = item
+        return CacheEntry(*meta, self._maps[segment][offset : offset + length])
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def close(self):
+        for m in self._maps.values():
+            m.close()
+        for f in self._files:
+            f.close()
+
+    def __enter__(self) -> "DLSite_ArchiveReader":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class DLSite_RecordingTransport(DLSite_Transport):
+    """
+    `DLSite_Transport` appending every response it downloads to `writer`.
+    Responses answered or revalidated from `cache` are not appended again.
+    """
+
+    def __init__(self, writer: DLSite_ArchiveWriter, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.writer = writer
+
+    def _send(
+        self, method: str, url: str, headers: dict, params: dict, **kwargs
+    ) -> requests.Response:
+        resp = super()._send(method, url, headers, params, **kwargs)
+        if not kwargs.get("stream"):
+            self._record(method, url, params, resp)
+        return resp
+
+    async def _async_send(
+        self,
+        session: aiohttp.ClientSession,
+        method: str,
+        url: str,
+        headers: dict,
+        params: dict,
+    ) -> requests.Response:
+        resp = await super()._async_send(session, method, url, headers, params)
+        self._record(method, url, params, resp)
+        return resp
+
+    def _record(self, method: str, url: str, params: dict, resp: requests.Response):
+        if resp.status_code != 304:
+            self.writer.append_response(util.get_request_key(method, url, params), resp)
+
+
+class DLSite_ReplayTransport(DLSite_Transport):
+    """
+    `DLSite_Transport` answering only from an archive, never touching the network.
+    """
+
+    def __init__(self, reader: DLSite_ArchiveReader, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.reader = reader
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict = {},
+        params: dict = {},
+        **kwargs,
+    ) -> requests.Response:
+        return self._replay(method, url, params)
+
+    async def async_request(
+        self,
+        session: aiohttp.ClientSession,
+        method: str,
+        url: str,
+        headers: dict = {},
+        params: dict = {},
+    ) -> requests.Response:
+        return self._replay(method, url, params)
+
+    def _replay(self, method: str, url: str, params: dict) -> requests.Response:
+        entry = self.reader.get(util.get_request_key(method, url, params))
+        if entry is None:
+            raise ValueError(f"{method} {url} {params} is not in the archive.")
+        return build_response(entry)
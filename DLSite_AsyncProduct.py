@@ -0,0 +1,175 @@
+import asyncio
+import json
+from typing import Iterable, List, Union
+
+import aiohttp
+
+from DLSite_Product import ALL_FIELDS, DLSite_Product, get_field_sources
+from DLSite_Transport import DLSite_Transport
+
+
+class DLSite_AsyncProduct(DLSite_Product):
+    """
+    `DLSite_Product` fetched with `aiohttp` through `DLSite_Transport.async_request`.
+    Work page and product info ajax needed by `fields` are requested concurrently,
+    parsing is done by the `extract_*` methods of `DLSite_Product`.
+    With `speculative_revision` the second revision ajax page is requested along with them,
+    wasted for every product without more update logs.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        session: aiohttp.ClientSession = None,
+        transport: DLSite_Transport = None,
+        fields: Iterable[str] = ALL_FIELDS,
+        speculative_revision: bool = False,
+    ) -> None:
+        super().__init__(url, lazy=True, transport=transport, fields=fields)
+        self.session = session
+        self.speculative_revision = speculative_revision
+
+    async def async_update(
+        self, session: aiohttp.ClientSession = None, fields: Iterable[str] = None
+    ):
+        session = session if session else self.session
+        if session is None:
+            raise ValueError("async_update requires an aiohttp.ClientSession.")
+        fields = tuple(fields) if fields is not None else self.fields
+        sources = get_field_sources(fields)
+
+        page_task = rest_task = revision_task = None
+        if "html" in sources:
+            page_task = asyncio.ensure_future(
+                self.async_get_content(session, self._get_work_url())
+            )
+        if "rest" in sources:
+            url, params = self._get_product_rest_request()
+            rest_task = asyncio.ensure_future(
+                self.async_get_content(session, url, params=params)
+            )
+        if "revision" in sources and self.speculative_revision:
+            url, params = self._get_update_logs_request(2)
+            revision_task = asyncio.ensure_future(
+                self.async_get_content(session, url, method="POST", params=params)
+            )
+
+        try:
+            content = await page_task if page_task else None
+            product_rest = None
+            if rest_task:
+                product_rest = json.loads(await rest_task)[self.id]
+            update_fields = [f for f in fields if f != "update_logs"]
+            self.update(content=content, fields=update_fields, product_rest=product_rest)
+            if content and "html" not in get_field_sources(update_fields):
+                # Update logs start on the work page, never fetch it again synchronously
+                self.get_soup(content=content)
+            if "revision" in sources:
+                self._update_logs = await self._async_extract_update_logs(
+                    session, revision_task
+                )
+        finally:
+            for task in (page_task, rest_task, revision_task):
+                if task and not task.done():
+                    task.cancel()
+
+    async def _async_extract_update_logs(
+        self, session: aiohttp.ClientSession, revision_task: asyncio.Future = None
+    ) -> list:
+        soup = self.get_soup()
+        update_logs = self._extract_update_logs_soup(soup)
+        if not soup.find(class_="version_up_more"):
+            if revision_task:
+                if revision_task.done() and not revision_task.cancelled():
+                    revision_task.exception()  # Discard speculative page result
+                revision_task.cancel()
+            return update_logs
+
+        page = 2
+        if revision_task is None:
+            url, params = self._get_update_logs_request(page)
+            revision_task = self.async_get_content(session, url, method="POST", params=params)
+        content = await revision_task
+        while True:
+            content_json = json.loads(content)
+            update_logs.extend(self._extract_update_logs_json(content_json))
+            if not content_json["more"]:
+                break
+            page += 1
+            url, params = self._get_update_logs_request(page)
+            content = await self.async_get_content(
+                session, url, method="POST", params=params
+            )
+        return update_logs
+
+    async def async_get_content(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        method: str = "GET",
+        headers: dict = {},
+        params: dict = {},
+    ) -> bytes:
+        resp = await self.transport.async_request(
+            session, method, url, headers=headers, params=params
+        )
+        if resp.ok and resp.content:
+            return resp.content
+        elif resp.status_code == 404:
+            raise ValueError("DLsite 404 Product Not Found.")
+        else:
+            raise ValueError("get_content requests Error.")
+
+
+async def fetch_many(
+    urls: Iterable[str],
+    concurrency: int = 10,
+    session: aiohttp.ClientSession = None,
+    fields: Iterable[str] = ALL_FIELDS,
+    speculative_revision: bool = False,
+    transport: DLSite_Transport = None,
+) -> List[Union[DLSite_AsyncProduct, Exception]]:
+    """
+    Fetch and parse `fields` of every product of `urls` with at most `concurrency` products in flight.
+    Return one item per url in order, the product or the exception it failed with (e.g. 404),
+    so a missing product does not abort the others.
+    Requests go through the cache, rate limiter and archive of `transport` (default transport if `None`).
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be positive, but got {concurrency}")
+    own_session = session is None
+    if own_session:
+        # Each product holds up to 3 connections at once
+        connector = aiohttp.TCPConnector(limit=concurrency * 3)
+        session = aiohttp.ClientSession(connector=connector)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _fetch(product: DLSite_AsyncProduct) -> DLSite_AsyncProduct:
+        async with semaphore:
+            await product.async_update(session)
+        return product
+
+    tasks = []
+    try:
+        products = [
+            DLSite_AsyncProduct(
+                url,
+                session=session,
+                transport=transport,
+                fields=fields,
+                speculative_revision=speculative_revision,
+            )
+            for url in urls
+        ]
+        tasks = [asyncio.ensure_future(_fetch(p)) for p in products]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        # Only left over when cancelled, the session must outlive them
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if own_session:
+            await session.close()
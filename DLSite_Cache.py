@@ -0,0 +1,112 @@
+import sqlite3
+import threading
+import time
+import zlib
+from typing import NamedTuple, Union
+
+import util
+
+JSON_URL_CLASSES = ("info", "revision")
+
+
+class CacheEntry(NamedTuple):
+    url: str
+    status: int
+    content_type: str
+    etag: str
+    last_modified: str
+    fetched_at: float
+    content: bytes
+
+
+class DLSite_Cache:
+    """
+    SQLite backed response cache of `DLSite_Transport`.
+    Bodies are stored zlib compressed, work pages and ajax json have separated TTL.
+    """
+
+    def __init__(
+        self,
+        path: str = "dlsite_cache.sqlite",
+        html_ttl: float = 24 * 60 * 60,
+        json_ttl: float = 60 * 60,
+        compress_level: int = 6,
+    ) -> None:
+        self.path = path
+        self.html_ttl = html_ttl
+        self.json_ttl = json_ttl
+        self.compress_level = compress_level
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS response (
+                    key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    status INTEGER NOT NULL,
+                    content_type TEXT NOT NULL,
+                    etag TEXT NOT NULL,
+                    last_modified TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    content BLOB NOT NULL
+                )
+                """
+            )
+
+    def get_ttl(self, url: str) -> float:
+        return self.json_ttl if util.get_url_class(url) in JSON_URL_CLASSES else self.html_ttl
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return time.time() - entry.fetched_at < self.get_ttl(entry.url)
+
+    def get(self, key: str) -> Union[CacheEntry, None]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, status, content_type, etag, last_modified, fetched_at, content"
+                " FROM response WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(*row[:-1], zlib.decompress(row[-1]))
+
+    def set(
+        self,
+        key: str,
+        url: str,
+        status: int,
+        content: bytes,
+        content_type: str = "",
+        etag: str = "",
+        last_modified: str = "",
+    ):
+        blob = zlib.compress(content, self.compress_level)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, status, content_type, etag, last_modified, time.time(), blob),
+            )
+
+    def touch(self, key: str):
+        """
+        Mark entry of `key` as fetched now, after a `304 Not Modified` revalidation.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE response SET fetched_at = ? WHERE key = ?", (time.time(), key)
+            )
+
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM response WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM response")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
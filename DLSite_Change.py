@@ -0,0 +1,121 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Tuple, Union
+
+from DLSite_Product import DLSite_Product, get_product_regions
+
+TRACKED_FIELDS = ("price", "dl_count", "rank", "update_logs")
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.name
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _to_json_value(value: Any) -> Any:
+    return json.loads(json.dumps(value, default=_json_default))
+
+
+def fingerprint_html(regions: str) -> str:
+    """
+    Return fingerprint of product regions html made by `get_product_regions`.
+    """
+    return hashlib.sha1(regions.encode("utf-8")).hexdigest()
+
+
+def fingerprint_rest(product_rest: dict) -> str:
+    """
+    Return fingerprint of product info ajax json, independent of key order.
+    """
+    text = json.dumps(product_rest, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class DLSite_ChangeTracker:
+    """
+    Keep fingerprints of the work page and the info ajax json of each product,
+    extract again only products with changed upstream data.
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS fingerprint (
+                    id TEXT PRIMARY KEY,
+                    html_hash TEXT NOT NULL,
+                    rest_hash TEXT NOT NULL,
+                    snapshot TEXT NOT NULL
+                )
+                """
+            )
+
+    def refresh(self, product: DLSite_Product) -> Dict[str, Tuple[Any, Any]]:
+        """
+        Fetch work page and info ajax of `product` and extract them only if they changed.
+        Return `{field: (old, new)}` of changed `TRACKED_FIELDS`, empty if nothing changed.
+        """
+        regions = get_product_regions(product.get_content(product._get_work_url()))
+        url, params = product._get_product_rest_request()
+        product_rest = json.loads(product.get_content(url, params=params))[product.id]
+        html_hash = fingerprint_html(regions)
+        rest_hash = fingerprint_rest(product_rest)
+
+        stored = self._get(product.id)
+        old_html_hash, old_rest_hash, old_snapshot = stored if stored else ("", "", {})
+        if html_hash == old_html_hash and rest_hash == old_rest_hash:
+            return {}
+
+        snapshot = dict(old_snapshot)
+        if html_hash != old_html_hash:
+            product.get_soup(content=regions, update=True)
+            product._update_logs = product.extract_update_logs()
+            snapshot["update_logs"] = _to_json_value(product._update_logs)
+        if rest_hash != old_rest_hash:
+            product._set_product_rest(product_rest)
+            product._rank = product.extract_rank()
+            snapshot["price"] = product_rest["price"]
+            snapshot["dl_count"] = int(product_rest["dl_count"] or 0)
+            snapshot["rank"] = _to_json_value(product._rank)
+
+        self._set(product.id, html_hash, rest_hash, snapshot)
+        return {
+            field: (old_snapshot.get(field), snapshot.get(field))
+            for field in TRACKED_FIELDS
+            if old_snapshot.get(field) != snapshot.get(field)
+        }
+
+    def forget(self, id_code: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM fingerprint WHERE id = ?", (id_code,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _get(self, id_code: str) -> Union[Tuple[str, str, dict], None]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT html_hash, rest_hash, snapshot FROM fingerprint WHERE id = ?",
+                (id_code,),
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def _set(self, id_code: str, html_hash: str, rest_hash: str, snapshot: dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fingerprint VALUES (?, ?, ?, ?)",
+                (id_code, html_hash, rest_hash, json.dumps(snapshot, ensure_ascii=False)),
+            )
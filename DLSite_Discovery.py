@@ -0,0 +1,156 @@
+import gzip
+import io
+import itertools
+import xml.etree.ElementTree as ET
+from typing import BinaryIO, Iterable, Iterator, List, TypeVar, Union
+
+import util
+from DLSite_Transport import DLSite_Transport, get_default_transport
+
+BASE_URL = "https://www.dlsite.com"
+NEW_RELEASE_URL = f"{BASE_URL}/maniax/fsr/=/order/release_d/per_page/100/page/{{page}}"
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+T = TypeVar("T")
+
+
+class IdBitset:
+    """
+    Growable bitset of id numbers, one bit per number up to the largest one added.
+    """
+
+    def __init__(self, size: int = 0) -> None:
+        self._bits = bytearray((size + 7) // 8)
+        self._count = 0
+
+    def add(self, id_num: int) -> bool:
+        """
+        Add `id_num`, return `False` if it was already in the set.
+        """
+        index, mask = id_num >> 3, 1 << (id_num & 7)
+        if index >= len(self._bits):
+            self._bits.extend(bytes(max(index + 1 - len(self._bits), len(self._bits))))
+        if self._bits[index] & mask:
+            return False
+        self._bits[index] |= mask
+        self._count += 1
+        return True
+
+    def __contains__(self, id_num: int) -> bool:
+        index = id_num >> 3
+        return index < len(self._bits) and bool(self._bits[index] & (1 << (id_num & 7)))
+
+    def __len__(self) -> int:
+        return self._count
+
+
+def dedup_ids(
+    id_codes: Iterable[str], seen: IdBitset = None, id_prefix: str = "RJ"
+) -> Iterator[str]:
+    """
+    Yield id codes of `id_codes` not in `seen` yet, `seen` is updated in place.
+    """
+    seen = seen if seen is not None else IdBitset()
+    for id_code in id_codes:
+        id_num = util.get_id_num(id_code, id_prefix)
+        if id_num is not None and seen.add(id_num):
+            yield util.get_id_code_from_num(id_num, id_prefix)
+
+
+def iter_range_ids(start: int, stop: int, id_prefix: str = "RJ") -> Iterator[str]:
+    """
+    Yield id codes of id numbers `start` to `stop` (exclusive).
+    """
+    for id_num in range(start, stop):
+        yield util.get_id_code_from_num(id_num, id_prefix)
+
+
+def iter_sitemap_locs(source: Union[bytes, str, BinaryIO]) -> Iterator[str]:
+    """
+    Yield every `<loc>` of a sitemap or sitemap index without building the tree.
+    `source` is sitemap bytes, a file path or a binary file, gzip compressed or not.
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            yield from iter_sitemap_locs(f)
+        return
+    if isinstance(source, bytes):
+        gzipped = source[:2] == GZIP_MAGIC
+        source = io.BytesIO(source)
+    elif hasattr(source, "peek"):
+        gzipped = source.peek(2)[:2] == GZIP_MAGIC
+    else:
+        gzipped = str(getattr(source, "name", "")).endswith(".gz")
+    if gzipped:
+        source = gzip.GzipFile(fileobj=source)
+
+    root = None
+    for event, element in ET.iterparse(source, events=("start", "end")):
+        if root is None:
+            root = element
+        if event != "end":
+            continue
+        tag = element.tag.rsplit("}", 1)[-1]
+        if tag == "loc" and element.text:
+            yield element.text.strip()
+        elif tag in ("url", "sitemap"):
+            # Drop finished entries so memory stays flat over huge sitemaps
+            root.clear()
+
+
+def iter_sitemap_ids(
+    url: str, transport: DLSite_Transport = None, id_prefix: str = "RJ"
+) -> Iterator[str]:
+    """
+    Yield id codes found in sitemap `url`, child sitemaps of a sitemap index are fetched in turn.
+    """
+    transport = transport if transport else get_default_transport()
+    resp = transport.request("GET", url)
+    if not resp.ok:
+        raise ValueError(f"Sitemap {url} requests Error.")
+    for loc in iter_sitemap_locs(resp.content):
+        if loc.endswith((".xml", ".xml.gz")):
+            yield from iter_sitemap_ids(loc, transport, id_prefix)
+            continue
+        id_code = util.get_id_code(loc, id_prefix)
+        if id_code:
+            yield id_code
+
+
+def iter_listing_ids(
+    url_template: str = NEW_RELEASE_URL,
+    transport: DLSite_Transport = None,
+    start_page: int = 1,
+    max_pages: int = None,
+    id_prefix: str = "RJ",
+) -> Iterator[str]:
+    """
+    Yield id codes linked from listing pages `url_template.format(page=page)` until a page has no new id.
+    """
+    transport = transport if transport else get_default_transport()
+    seen = IdBitset()
+    for page in itertools.count(start_page):
+        if max_pages is not None and page >= start_page + max_pages:
+            break
+        resp = transport.request("GET", url_template.format(page=page))
+        if not resp.ok:
+            break
+        text = resp.content.decode("utf-8", errors="replace")
+        new_ids = list(dedup_ids(util.find_id_codes(text, id_prefix), seen, id_prefix))
+        if not new_ids:
+            break
+        yield from new_ids
+
+
+def chunked(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """
+    Yield lists of `size` items of `iterable`, last one may be shorter.
+    Feeds discovered ids to `DLSite_Product.fetch_rest_many` or `DLSite_AsyncProduct.fetch_many`.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
@@ -1,4 +1,5 @@
 from enum import Enum, auto
+from typing import Iterable, List
 
 
 class DLSite_Rate(Enum):
@@ -65,3 +66,62 @@ DLSite_Type_Info = {
     DLSite_Type.OTHER: {"name": "その他", "keyword": {"ET3": "その他", "VCM": "ボイスコミック"}},
     DLSite_Type.ALL: {"name": "総合", "keyword": {"_ALL": "総合"}},
 }
+
+
+def _build_keyword_index(info: dict) -> dict:
+    index = {}
+    for enum_, enum_info in info.items():
+        for keyword in enum_info["keyword"]:
+            if isinstance(keyword, str):
+                index.setdefault(keyword, enum_)
+    return index
+
+
+# Reverse index of `DLSite_Type_Info` and `DLSite_Rate_Info` keywords, built at import
+DLSite_Type_Keyword = _build_keyword_index(DLSite_Type_Info)
+DLSite_Rate_Keyword = _build_keyword_index(DLSite_Rate_Info)
+# Ranking category (`_` prefixed keyword without `_`) to type, e.g. `"voice"` -> `VOICE`
+DLSite_Type_Category = {
+    keyword[1:].lower(): type_
+    for keyword, type_ in DLSite_Type_Keyword.items()
+    if keyword.startswith("_")
+}
+
+
+def get_type(type_keyword: str) -> DLSite_Type:
+    """
+    Return `DLSite_Type` of `type_keyword` (case insensitive), or `DLSite_Type.OTHER` if not known.
+    """
+    return DLSite_Type_Keyword.get(type_keyword.upper(), DLSite_Type.OTHER)
+
+
+def get_category_type(category: str) -> DLSite_Type:
+    """
+    Return `DLSite_Type` of ranking `category`, or `DLSite_Type.OTHER` if not known.
+    """
+    return DLSite_Type_Category.get(category.lower(), DLSite_Type.OTHER)
+
+
+def get_rate(rate_keyword: str) -> DLSite_Rate:
+    """
+    Return `DLSite_Rate` of `rate_keyword`, or `DLSite_Rate.UNKNOWN` if not known.
+    """
+    return DLSite_Rate_Keyword.get(rate_keyword, DLSite_Rate.UNKNOWN)
+
+
+def classify_types(type_keywords: Iterable[str]) -> List[DLSite_Type]:
+    """
+    Return `DLSite_Type` of every keyword in `type_keywords`, same as `get_type` on each.
+    """
+    get = DLSite_Type_Keyword.get
+    other = DLSite_Type.OTHER
+    return [get(kw.upper(), other) for kw in type_keywords]
+
+
+def classify_rates(rate_keywords: Iterable[str]) -> List[DLSite_Rate]:
+    """
+    Return `DLSite_Rate` of every keyword in `rate_keywords`, same as `get_rate` on each.
+    """
+    get = DLSite_Rate_Keyword.get
+    unknown = DLSite_Rate.UNKNOWN
+    return [get(kw, unknown) for kw in rate_keywords]
@@ -0,0 +1,155 @@
+from typing import Any, Dict, Iterable, List, Union
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional, only needed by `ProductParquetWriter`
+    pa = pq = None
+
+import util
+from DLSite_Product import DLSite_Product
+from DLSite_Record import ProductRecord
+
+
+def get_product_schema() -> "pa.Schema":
+    """
+    Return fixed Arrow schema of exported products.
+    """
+    _require_pyarrow()
+    category = pa.dictionary(pa.int8(), pa.string())
+    return pa.schema(
+        [
+            ("id", pa.string()),
+            ("id_num", pa.int64()),
+            ("name", pa.string()),
+            ("maker_id", pa.string()),
+            ("maker_name", pa.string()),
+            ("date", pa.timestamp("s")),
+            ("size", pa.int64()),
+            ("type", category),
+            ("type_keyword", category),
+            ("rate", category),
+            ("tags", pa.list_(pa.struct([("id", pa.int32()), ("name", pa.string())]))),
+            ("img_links", pa.list_(pa.string())),
+            (
+                "rankings",
+                pa.list_(
+                    pa.struct(
+                        [
+                            ("term", pa.string()),
+                            ("category", pa.string()),
+                            ("rank_date", pa.timestamp("s")),
+                        ]
+                    )
+                ),
+            ),
+            ("rate_average", pa.float64()),
+            ("is_sale", pa.bool_()),
+            ("price", pa.int64()),
+            ("price_without_tax", pa.int64()),
+            ("original_price", pa.int64()),
+            ("sale_count", pa.int64()),
+            ("wishlist_count", pa.int64()),
+        ]
+    )
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow is required to export products to Arrow/Parquet")
+
+
+class ProductParquetWriter:
+    """
+    Stream `ProductRecord` into a Parquet file, `row_group_size` records are buffered per row group.
+    """
+
+    INFO_COLUMNS = (
+        "is_sale",
+        "price",
+        "price_without_tax",
+        "original_price",
+        "sale_count",
+        "wishlist_count",
+    )
+
+    def __init__(
+        self, path: str, row_group_size: int = 10000, compression: str = "zstd"
+    ) -> None:
+        _require_pyarrow()
+        if row_group_size < 1:
+            raise ValueError(f"row_group_size must be positive, but got {row_group_size}")
+        self.path = path
+        self.row_group_size = row_group_size
+        self.schema = get_product_schema()
+        self._writer = pq.ParquetWriter(path, self.schema, compression=compression)
+        self._columns = self._new_columns()
+        self._rows = 0
+
+    def write(self, record: Union[ProductRecord, DLSite_Product]):
+        if isinstance(record, DLSite_Product):
+            record = record.to_record()
+        columns = self._columns
+        columns["id"].append(record.id)
+        columns["id_num"].append(util.get_id_num(record.id, "RJ"))
+        columns["name"].append(record.name)
+        columns["maker_id"].append(record.maker_id)
+        columns["maker_name"].append(record.maker_name)
+        columns["date"].append(record.date)
+        columns["size"].append(record.size)
+        columns["type"].append(record.type.name)
+        columns["type_keyword"].append(record.type_keyword)
+        columns["rate"].append(record.rate.name)
+        columns["tags"].append(record.tags)
+        columns["img_links"].append(record.img_links)
+
+        rank = record.rank or {}
+        columns["rankings"].append(
+            [
+                {
+                    "term": r["term"],
+                    "category": r["category"].name,
+                    "rank_date": r["rank_date"],
+                }
+                for r in rank.get("rankings", [])
+            ]
+        )
+        columns["rate_average"].append(rank.get("rate"))
+        info = record.info or {}
+        for column in self.INFO_COLUMNS:
+            columns[column].append(info.get(column))
+
+        self._rows += 1
+        if self._rows >= self.row_group_size:
+            self.flush()
+
+    def write_many(self, records: Iterable[Union[ProductRecord, DLSite_Product]]):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        if not self._rows:
+            return
+        table = pa.Table.from_arrays(
+            [
+                pa.array(self._columns[field.name], type=field.type)
+                for field in self.schema
+            ],
+            schema=self.schema,
+        )
+        self._writer.write_table(table, row_group_size=self.row_group_size)
+        self._columns = self._new_columns()
+        self._rows = 0
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+    def __enter__(self) -> "ProductParquetWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _new_columns(self) -> Dict[str, List[Any]]:
+        return {name: [] for name in self.schema.names}
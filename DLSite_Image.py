@@ -0,0 +1,225 @@
+import hashlib
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, NamedTuple, Tuple, Union
+from urllib.parse import urlsplit
+
+from DLSite_Product import DLSite_Product
+from DLSite_Transport import DLSite_Transport, get_default_transport
+
+CHUNK_SIZE = 1 << 16
+
+
+class ImageResult(NamedTuple):
+    url: str
+    product_id: Union[str, None]
+    sha256: str
+    path: str
+    size: int
+    # One of "downloaded", "url_dedup" or "hash_dedup"
+    status: str
+
+
+class DownloadStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.bytes = 0
+        self.downloaded = 0
+        self.deduplicated = 0
+
+    def add_bytes(self, nbytes: int):
+        with self._lock:
+            self.bytes += nbytes
+
+    def add_result(self, result: ImageResult):
+        with self._lock:
+            if result.status == "downloaded":
+                self.downloaded += 1
+            else:
+                self.deduplicated += 1
+
+    @property
+    def bytes_per_second(self) -> float:
+        elapsed = time.monotonic() - self.started_at
+        return self.bytes / elapsed if elapsed > 0 else 0.0
+
+
+class DLSite_ImageDownloader:
+    """
+    Mirror product images into `directory` with at most `max_workers` concurrent downloads.
+    Bodies are streamed to `.part` files, resumed with a Range request when interrupted,
+    and stored by sha256 so identical images of several products are kept once.
+    Downloaded urls are remembered in a SQLite manifest and not requested again.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        transport: DLSite_Transport = None,
+        max_workers: int = 4,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> None:
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be positive, but got {max_workers}")
+        self.directory = directory
+        self.transport = transport if transport else get_default_transport()
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.stats = DownloadStats()
+        os.makedirs(os.path.join(directory, "partial"), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(directory, "manifest.sqlite"), check_same_thread=False
+        )
+        with self._lock, self._conn:
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS image (
+                    url TEXT PRIMARY KEY,
+                    product_id TEXT,
+                    sha256 TEXT NOT NULL,
+                    size INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS image_sha256 ON image (sha256);
+                """
+            )
+
+    def download(self, url: str, product_id: str = None) -> ImageResult:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sha256, size FROM image WHERE url = ?", (url,)
+            ).fetchone()
+        if row and os.path.exists(self.get_path(row[0], url)):
+            path = self.get_path(row[0], url)
+            result = ImageResult(url, product_id, row[0], path, row[1], "url_dedup")
+            self.stats.add_result(result)
+            return result
+
+        part_path = os.path.join(
+            self.directory, "partial", hashlib.sha1(url.encode("utf-8")).hexdigest() + ".part"
+        )
+        sha256, size = self._fetch(url, part_path)
+        path = self.get_path(sha256, url)
+        if os.path.exists(path):
+            os.remove(part_path)
+            status = "hash_dedup"
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(part_path, path)
+            status = "downloaded"
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO image VALUES (?, ?, ?, ?)",
+                (url, product_id, sha256, size),
+            )
+        result = ImageResult(url, product_id, sha256, path, size, status)
+        self.stats.add_result(result)
+        return result
+
+    def download_many(
+        self, items: Iterable[Union[str, Tuple[str, str]]]
+    ) -> Iterator[ImageResult]:
+        """
+        Download urls or `(url, product_id)` pairs of `items`, yield results in the order of `items`.
+        `items` is consumed a window at a time, urls repeated inside `items` are downloaded once.
+        """
+        items = (
+            (item, None) if isinstance(item, str) else tuple(item) for item in items
+        )
+        window = self.max_workers * 4
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                batch = list(itertools.islice(items, window))
+                if not batch:
+                    break
+                # Same url twice in a batch must not be streamed into one part file concurrently
+                futures = {}
+                for url, product_id in batch:
+                    if url not in futures:
+                        futures[url] = executor.submit(self.download, url, product_id)
+                yielded = set()
+                for url, product_id in batch:
+                    result = futures[url].result()
+                    if url in yielded:
+                        result = result._replace(product_id=product_id, status="url_dedup")
+                        self.stats.add_result(result)
+                    yielded.add(url)
+                    yield result
+
+    def download_products(
+        self, products: Iterable[Union[DLSite_Product, str]]
+    ) -> Iterator[ImageResult]:
+        """
+        Download `img_links` of every product in `products`, plain id codes or urls are turned into `DLSite_Product`.
+        """
+
+        def iter_items():
+            for product in products:
+                if not isinstance(product, DLSite_Product):
+                    product = DLSite_Product(
+                        product, lazy=True, transport=self.transport, fields=("img_links",)
+                    )
+                for url in product.img_links:
+                    yield url, product.id
+
+        return self.download_many(iter_items())
+
+    def get_path(self, sha256: str, url: str) -> str:
+        ext = os.path.splitext(urlsplit(url).path)[1].lower()
+        return os.path.join(self.directory, "objects", sha256[:2], sha256 + ext)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "DLSite_ImageDownloader":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _fetch(self, url: str, part_path: str) -> Tuple[str, int]:
+        """
+        Stream `url` into `part_path`, continuing an existing part, return sha256 and size of the whole body.
+        """
+        hasher = hashlib.sha256()
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        resp = self.transport.request("GET", url, headers=headers, stream=True)
+        try:
+            if resp.status_code == 416 and offset:
+                # Part is already complete
+                self._hash_file(hasher, part_path)
+                return hasher.hexdigest(), offset
+            if resp.status_code == 206 and offset:
+                self._hash_file(hasher, part_path)
+                mode = "ab"
+            elif resp.status_code == 200:
+                offset = 0
+                mode = "wb"
+            else:
+                raise ValueError(f"image request Error. {resp.status_code} {url}")
+
+            size = offset
+            with open(part_path, mode) as f:
+                for chunk in resp.iter_content(self.chunk_size):
+                    f.write(chunk)
+                    hasher.update(chunk)
+                    size += len(chunk)
+                    self.stats.add_bytes(len(chunk))
+        finally:
+            resp.close()
+        return hasher.hexdigest(), size
+
+    def _hash_file(self, hasher: "hashlib._Hash", path: str):
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                hasher.update(chunk)
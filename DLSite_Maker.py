@@ -1,18 +1,26 @@
-from typing import Union
+import re
+import threading
+import time
+import weakref
+from typing import Iterable, Iterator, List
+
 from bs4 import BeautifulSoup
-import requests
 
-from . import util
+import util
+from DLSite_Observer import DLSite_Observer, observe_extract
+from DLSite_Transport import DLSite_Transport, get_default_transport
 
-BASE_URL = "www.dlsite.com"
+BASE_URL = "https://www.dlsite.com"
 
 
 class DLSite_Maker:
-    def __init__(self, url: str) -> None:
+    def __init__(self, url: str, transport: DLSite_Transport = None) -> None:
         self.id_prefix = "RG"
         self.id = util.get_id_code(url, self.id_prefix)
         self.id_num = util.get_id_num(url, self.id_prefix)
 
+        self.transport = transport if transport else get_default_transport()
+
         self.name = ""
 
         self.soup_cache = None
@@ -22,15 +30,70 @@ class DLSite_Maker:
             self.name = self.extract_name()
         return self.name
 
+    @observe_extract
     def extract_name(self) -> str:
         soup = self.get_soup()
         name_soup = soup.find(class_="prof_maker_name")
         name = name_soup.get_text(strip=True) if name_soup else ""
         return name
 
-    def get_content(self) -> bytes:
-        url = f"{BASE_URL}/maniax/circle/profile/=/maker_id/{self.id}.html"
-        resp = requests.get(url)
+    def iter_work_ids(self, per_page: int = 100) -> Iterator[str]:
+        """
+        Yield id code of every work of the maker, one search result page at a time.
+        """
+        seen = set()
+        page = 1
+        while True:
+            content = self.get_content(self._get_works_url(page, per_page))
+            soup = BeautifulSoup(content, "lxml")
+            # Only the result list, ranking and recommendation blocks link other works
+            result_soup = soup.find(id="search_result_list")
+            links = (
+                result_soup.find_all("a", href=re.compile(r"/product_id/[Rr][Jj]"))
+                if result_soup
+                else []
+            )
+            new_ids = []
+            for a in links:
+                id_code = util.get_id_code(a["href"], "RJ")
+                if id_code and id_code not in seen:
+                    seen.add(id_code)
+                    new_ids.append(id_code)
+            if not new_ids:
+                break
+            yield from new_ids
+            if len(new_ids) < per_page:
+                break
+            page += 1
+
+    def get_works(
+        self,
+        fields: Iterable[str] = None,
+        per_page: int = 100,
+        chunk_size: int = 50,
+    ) -> List["DLSite_Product"]:
+        """
+        Return every work of the maker as `DLSite_Product` with `fields` extracted.
+        Info ajax of all works is fetched in batches of `chunk_size`,
+        works missing from it (e.g. no longer sold) are left out instead of fetched one by one.
+        """
+        from DLSite_Product import DEFAULT_FIELDS, DLSite_Product, get_field_sources
+
+        fields = tuple(fields) if fields is not None else DEFAULT_FIELDS
+        products = [
+            DLSite_Product(id_code, lazy=True, transport=self.transport, fields=fields)
+            for id_code in self.iter_work_ids(per_page=per_page)
+        ]
+        if "rest" in get_field_sources(fields):
+            DLSite_Product.fetch_rest_many(products, chunk_size=chunk_size)
+            products = [p for p in products if p._product_rest]
+        for product in products:
+            product.update(product_rest=product._product_rest)
+        return products
+
+    def get_content(self, url: str = None) -> bytes:
+        url = url if url else f"{BASE_URL}/maniax/circle/profile/=/maker_id/{self.id}.html"
+        resp = self.transport.request("GET", url)
         if resp.ok and resp.content:
             return resp.content
         else:
@@ -39,5 +102,50 @@ class DLSite_Maker:
     def get_soup(self, content: bytes = None, update: bool = False) -> BeautifulSoup:
         if not (self.soup_cache) or content or update:
             content = content if content else self.get_content()
+            observer = self.observer
+            start = time.perf_counter()
             self.soup_cache = BeautifulSoup(content, "lxml")
-        return self.soup_cache
\ No newline at end of file
+            if observer.enabled:
+                observer.on_parse("maker", len(content), time.perf_counter() - start)
+        return self.soup_cache
+
+    @property
+    def observer(self) -> DLSite_Observer:
+        return self.transport.observer
+
+    def _get_works_url(self, page: int, per_page: int) -> str:
+        return f"{BASE_URL}/maniax/fsr/=/maker_id/{self.id}/per_page/{per_page}/page/{page}"
+
+
+# Makers are kept in `DLSite_Transport.makers`, so a maker never fetches through
+# another product's transport and is freed along with its transport
+_transports: "weakref.WeakSet[DLSite_Transport]" = weakref.WeakSet()
+_makers_lock = threading.Lock()
+
+
+def get_maker(url: str, transport: DLSite_Transport = None) -> DLSite_Maker:
+    """
+    Return `DLSite_Maker` of the RG id in `url` shared by everything using `transport`
+    (default transport if `None`), create it on first use.
+    `url` without RG id returns a new not shared `DLSite_Maker`.
+    """
+    transport = transport if transport else get_default_transport()
+    id_code = util.get_id_code(url, "RG")
+    if id_code is None:
+        return DLSite_Maker(url, transport=transport)
+    with _makers_lock:
+        maker = transport.makers.get(id_code)
+        if maker is None:
+            maker = transport.makers[id_code] = DLSite_Maker(url, transport=transport)
+            _transports.add(transport)
+    return maker
+
+
+def clear_makers():
+    """
+    Forget all shared `DLSite_Maker` of `get_maker`.
+    """
+    with _makers_lock:
+        for transport in list(_transports):
+            transport.makers.clear()
+        _transports.clear()
@@ -0,0 +1,161 @@
+import bisect
+import functools
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class DLSite_Observer:
+    """
+    No-op observer of requests, soup parses, extractions and cache lookups.
+    Subclass it and set `enabled` to receive events.
+    """
+
+    enabled = False
+
+    def on_request(
+        self, url_class: str, method: str, status: Union[int, None], nbytes: int, latency: float
+    ):
+        pass
+
+    def on_parse(self, kind: str, nbytes: int, latency: float):
+        pass
+
+    def on_extract(self, extractor: str, latency: float):
+        pass
+
+    def on_cache(self, url_class: str, result: str):
+        """
+        `result` is one of `"hit"`, `"miss"` or `"revalidated"`.
+        """
+        pass
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], **extra: str) -> str:
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class MetricsObserver(DLSite_Observer):
+    """
+    In-process aggregator of observer events, `render` them in OpenMetrics text format.
+    """
+
+    enabled = True
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS, prefix: str = "dlsite") -> None:
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[tuple, Histogram]] = defaultdict(dict)
+        self._counters: Dict[str, Dict[tuple, int]] = defaultdict(lambda: defaultdict(int))
+
+    def on_request(
+        self, url_class: str, method: str, status: Union[int, None], nbytes: int, latency: float
+    ):
+        labels = (("url_class", url_class), ("method", method))
+        with self._lock:
+            self._observe("request_seconds", labels, latency)
+            self._counters["request_bytes"][labels] += nbytes
+            self._counters["requests"][labels + (("status", str(status)),)] += 1
+
+    def on_parse(self, kind: str, nbytes: int, latency: float):
+        labels = (("kind", kind),)
+        with self._lock:
+            self._observe("parse_seconds", labels, latency)
+            self._counters["parse_bytes"][labels] += nbytes
+
+    def on_extract(self, extractor: str, latency: float):
+        with self._lock:
+            self._observe("extract_seconds", (("extractor", extractor),), latency)
+
+    def on_cache(self, url_class: str, result: str):
+        with self._lock:
+            self._counters["cache"][(("url_class", url_class), ("result", result))] += 1
+
+    def _observe(self, name: str, labels: tuple, value: float):
+        histogram = self._histograms[name].get(labels)
+        if histogram is None:
+            histogram = self._histograms[name][labels] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for labels, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                        cumulative += count
+                        lines.append(
+                            f"{metric}_bucket{_format_labels(labels, le=str(bound))} {cumulative}"
+                        )
+                    lines.append(f"{metric}_sum{_format_labels(labels)} {histogram.sum}")
+                    lines.append(f"{metric}_count{_format_labels(labels)} {histogram.count}")
+            for name, series in sorted(self._counters.items()):
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {metric} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{metric}_total{_format_labels(labels)} {value}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def observe_extract(func: Callable) -> Callable:
+    """
+    Report latency of an `extract_*` method to the observer of its object's transport.
+    """
+    extractor = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        observer = self.transport.observer
+        if not observer.enabled:
+            return func(self, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            observer.on_extract(extractor, time.perf_counter() - start)
+
+    return wrapper
+
+
+_default_observer = DLSite_Observer()
+
+
+def get_default_observer() -> DLSite_Observer:
+    return _default_observer
+
+
+def set_default_observer(observer: DLSite_Observer):
+    """
+    Replace process-wide observer used by transports created without one.
+    """
+    global _default_observer
+    _default_observer = observer
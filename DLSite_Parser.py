@@ -0,0 +1,75 @@
+import itertools
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, NamedTuple, Tuple, Union
+
+from DLSite_Product import DLSite_Product
+from DLSite_Record import ProductRecord
+
+RestJson = Union[bytes, str, dict, None]
+
+
+def parse_product(url: str, content: bytes, product_rest: RestJson = None) -> ProductRecord:
+    """
+    Parse raw work page `content` and optional product info ajax `product_rest` of product `url`.
+    Return picklable `ProductRecord` of the extracted fields, network is never used.
+    """
+    product = DLSite_Product(url, lazy=True, partial_parse=True)
+    product.get_soup(content=content)
+
+    if isinstance(product_rest, (bytes, str)):
+        product_rest = json.loads(product_rest)
+    if product_rest:
+        # Accept raw `product/info/ajax` response keyed by product id as well
+        product._product_rest = product_rest.get(product.id, product_rest)
+
+    return product.to_record(rest=bool(product_rest))
+
+
+class ParseError(NamedTuple):
+    """
+    Yielded by `parse_many` in place of the record of a page that could not be parsed.
+    """
+
+    url: str
+    error: str
+
+
+def _parse_chunk(
+    chunk: List[Tuple[str, bytes, RestJson]]
+) -> List[Union[ProductRecord, ParseError]]:
+    results = []
+    for url, content, product_rest in chunk:
+        # Maintenance, age gate or deleted work pages must not fail the other pages
+        try:
+            results.append(parse_product(url, content, product_rest))
+        except Exception as e:
+            results.append(ParseError(url, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def parse_many(
+    pages: Iterable[Tuple[str, bytes, RestJson]],
+    max_workers: int = None,
+    chunksize: int = 16,
+) -> Iterator[Union[ProductRecord, ParseError]]:
+    """
+    Parse `(url, content, product_rest)` items of `pages` in a `ProcessPoolExecutor`.
+    Yield records of `parse_product` in the order of `pages`, or `ParseError` for pages that failed.
+    Chunks of `chunksize` pages are submitted as results are consumed, at most two per worker in flight.
+    """
+    pages = iter(pages)
+    max_pending = (max_workers or os.cpu_count() or 1) * 2
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            while len(pending) < max_pending:
+                chunk = list(itertools.islice(pages, chunksize))
+                if not chunk:
+                    break
+                pending.append(executor.submit(_parse_chunk, chunk))
+            if not pending:
+                break
+            yield from pending.popleft().result()
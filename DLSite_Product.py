@@ -1,69 +1,214 @@
+import copy
 import json
 import re
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List, Tuple, Union
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Set, Tuple, Union
 
-import requests
-from bs4 import BeautifulSoup, NavigableString
+import lxml.html
+from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4.dammit import UnicodeDammit
 
 import util
-from DLSite_Enum import DLSite_Rate, DLSite_Rate_Info, DLSite_Type, DLSite_Type_Info
-from DLSite_Maker import DLSite_Maker
+from DLSite_Enum import (
+    DLSite_Rate,
+    DLSite_Type,
+    DLSite_Type_Info,
+    get_category_type,
+    get_rate,
+    get_type,
+)
+from DLSite_Maker import DLSite_Maker, get_maker
+from DLSite_Observer import DLSite_Observer, observe_extract
+from DLSite_Record import ProductRecord
+from DLSite_Store import DLSite_Store
+from DLSite_Transport import DLSite_Transport, get_default_transport
 
 BASE_URL = "https://www.dlsite.com"
 
+# Sources needed by each field, "html" is the work page, "rest" the product info ajax
+# and "revision" the update log pages of product revision ajax
+FIELD_SOURCES = {
+    "name": ("html",),
+    "maker": ("html",),
+    "date": ("html",),
+    "size": ("html",),
+    "type": ("html",),
+    "rate": ("html",),
+    "tags": ("html",),
+    "img_links": ("html",),
+    "rank": ("rest",),
+    "sale_info": ("rest",),
+    "info": ("html", "rest"),
+    "update_logs": ("html", "revision"),
+}
+DEFAULT_FIELDS = ("name", "maker", "date", "size", "type", "rate")
+ALL_FIELDS = tuple(FIELD_SOURCES)
+# Memoized attribute of each field, "type" holds `(DLSite_Type, keyword)`
+FIELD_ATTRS = {field: f"_{field}" for field in FIELD_SOURCES}
+
+
+class _Unset:
+    def __repr__(self) -> str:
+        return "<unset>"
+
+
+# Value of a memoized field not computed yet, falsy values like `[]` are valid results
+_UNSET = _Unset()
+
+# Regions of the work page read by the `extract_*` methods
+_XPATH_CLASS = 'contains(concat(" ", normalize-space(@class), " "), " {} ")'
+PRODUCT_REGIONS_XPATH = "//*[{}]".format(
+    " or ".join(
+        [
+            '@id="work_name"',
+            '@id="work_outline"',
+            _XPATH_CLASS.format("maker_name"),
+            _XPATH_CLASS.format("product-slider-data"),
+            f'({_XPATH_CLASS.format("work_article")} and {_XPATH_CLASS.format("version_up")})',
+            _XPATH_CLASS.format("version_up_more"),
+        ]
+    )
+)
+_TABLE_PART_TAGS = ("thead", "tbody", "tfoot", "tr", "th", "td")
+_REGEX_DL_ITEM = re.compile(r"^d")
+_REGEX_TAG_ID = re.compile(r"\d{3}")
+_REGEX_INFO_TITLE = re.compile(r"^[/ ]*|[/ ]*$")
+
+
+def get_product_regions(content: Union[bytes, str]) -> str:
+    """
+    Return html of only the product regions of work page `content`, found with lxml XPath.
+    """
+    if isinstance(content, bytes):
+        # Same encoding detection as `BeautifulSoup`
+        content = UnicodeDammit(content, is_html=True).unicode_markup
+    tree = lxml.html.document_fromstring(content)
+    regions = []
+    for element in tree.xpath(PRODUCT_REGIONS_XPATH):
+        # Table parts can not be parsed alone, keep whole table
+        while element.tag in _TABLE_PART_TAGS and element.getparent() is not None:
+            element = element.getparent()
+        ancestors = set(element.iterancestors())
+        if element in regions or ancestors.intersection(regions):
+            continue
+        regions = [r for r in regions if element not in set(r.iterancestors())]
+        regions.append(element)
+    body = "".join(
+        lxml.html.tostring(r, encoding="unicode", with_tail=False) for r in regions
+    )
+    return f"<html><body>{body}</body></html>"
+
+
+def get_field_sources(fields: Iterable[str]) -> Set[str]:
+    """
+    Return set of sources needed to extract all `fields`.
+    """
+    sources = set()
+    for field in fields:
+        if field not in FIELD_SOURCES:
+            _SEP = '", "'
+            raise ValueError(
+                f'Supported field is "{_SEP.join(FIELD_SOURCES)}", but got {field}'
+            )
+        sources.update(FIELD_SOURCES[field])
+    return sources
+
 
 class DLSite_Product:
-    def __init__(self, url: str, lazy: bool = False) -> None:
+    def __init__(
+        self,
+        url: str,
+        lazy: bool = False,
+        transport: DLSite_Transport = None,
+        fields: Iterable[str] = DEFAULT_FIELDS,
+        partial_parse: bool = False,
+        thread_safe: bool = False,
+    ) -> None:
         self.id_prefix = "RJ"
         self.id = util.get_id_code(url, self.id_prefix)
         self.id_num = util.get_id_num(url, self.id_prefix)
 
-        self._name = ""
-        self._maker = None
-
-        self._date = None
-        self._size = -1
-        self._type = DLSite_Type.UNKNOWN
-        self._type_kw = ""
-        self._rate = DLSite_Rate.UNKNOWN
+        self.transport = transport if transport else get_default_transport()
+        self.fields = tuple(fields)
+        get_field_sources(self.fields)
+        # Build soup of product regions only, see `get_product_regions`
+        self.partial_parse = partial_parse
+        # Compute each field and fetch each source once when shared between threads
+        self._lock = threading.RLock() if thread_safe else None
 
         self._description = ""
-        self._tags = []
-        self._img_links = []
-        self._rank = {}
-        self._info = {}
-        self._update_logs = []
+        for attr in FIELD_ATTRS.values():
+            setattr(self, attr, _UNSET)
 
         self._soup = None
+        self._work_outline = None
         self._product_rest = {}
 
         if not lazy:
             self.update()
 
-    def update(self):
-        self._soup = self.get_soup(update=True)
-
-        self.name = self.extract_name()
-        _maker_url, _maker_name = self.extract_maker()
-        self.maker = DLSite_Maker(_maker_url)
-        self.maker.name = _maker_name
-
-        self.date = self.extract_date()
-        self.size = self.extract_size()
-        self.type, self.type_keyword = self.extract_type()
-        self.rate = self.extract_rate()
+    def update(
+        self,
+        content: bytes = None,
+        fields: Iterable[str] = None,
+        product_rest: dict = None,
+    ):
+        """
+        Fetch only the sources needed by `fields` (default `self.fields`) and extract them.
+        Already fetched work page `content` or info ajax `product_rest` are used instead of fetching.
+        """
+        fields = tuple(fields) if fields is not None else self.fields
+        sources = get_field_sources(fields)
+        if "html" in sources:
+            self._soup = self.get_soup(content=content, update=True)
+        if "rest" in sources:
+            if product_rest:
+                self._set_product_rest(product_rest)
+            else:
+                self.get_product_rest(update=True)
+
+        if "name" in fields:
+            self.name = self.extract_name()
+        if "maker" in fields:
+            _maker_url, _maker_name = self.extract_maker()
+            self.maker = get_maker(_maker_url, transport=self.transport)
+            if _maker_name:
+                self.maker.name = _maker_name
+        if "date" in fields:
+            self.date = self.extract_date()
+        if "size" in fields:
+            self.size = self.extract_size()
+        if "type" in fields:
+            self._type = self.extract_type()
+        if "rate" in fields:
+            self.rate = self.extract_rate()
+        if "tags" in fields:
+            self.tags = self.extract_tags()
+        if "img_links" in fields:
+            self.img_links = self.extract_img_links()
+        if "rank" in fields:
+            self._rank = self.extract_rank()
+        if "sale_info" in fields:
+            self._sale_info = self.extract_info(addition_info=False)
+        if "info" in fields:
+            self._info = self.extract_info()
+        if "update_logs" in fields:
+            self._update_logs = self.extract_update_logs()
 
     @property  # of self.name
     def name(self) -> str:
-        if not self._name:
-            self._name = self.extract_name()
-        return self._name
+        return self._get_lazy("_name", self.extract_name)
 
     @name.setter
     def name(self, name: str):
         self._name = name
 
+    @observe_extract
     def extract_name(self) -> str:
         soup = self.get_soup()
         name_soup = soup.find(id="work_name")
@@ -72,12 +217,7 @@ class DLSite_Product:
 
     @property  # of self.maker
     def maker(self) -> Union[DLSite_Maker, None]:
-        if not self._maker:
-            maker_url, maker_name = self.extract_maker()
-            if maker_url and maker_name:
-                self._maker = DLSite_Maker(maker_url)
-                self._maker.name = maker_name
-        return self._maker
+        return self._get_lazy("_maker", self._extract_maker)
 
     @maker.setter
     def maker(self, maker: DLSite_Maker):
@@ -90,6 +230,7 @@ class DLSite_Product:
     def get_maker_name(self) -> str:
         return self.maker.get_name() if self.maker else ""
 
+    @observe_extract
     def extract_maker(self) -> Tuple[str, str]:
         soup = self.get_soup()
         maker_soup = soup.find(class_="maker_name")
@@ -105,35 +246,39 @@ class DLSite_Product:
 
         return maker_url, maker_name
 
+    def _extract_maker(self) -> Union[DLSite_Maker, None]:
+        maker_url, maker_name = self.extract_maker()
+        if not (maker_url and maker_name):
+            return None
+        maker = get_maker(maker_url, transport=self.transport)
+        maker.name = maker_name
+        return maker
+
     @property  # of self.date
     def date(self) -> datetime:
-        if not self._date:
-            self._date = self.extract_date()
-        return self._date
+        return self._get_lazy("_date", self.extract_date)
 
     @date.setter
     def date(self, date: datetime):
         self._date = date
 
+    @observe_extract
     def extract_date(self) -> datetime:
         soup = self.get_soup()
         date_soup = self._get_select_work_outline_soup(soup, "販売日")
         date_str = date_soup.get_text(strip=True) if date_soup else ""
-        if date_str:
-            year, month, day = re.match(r"(\d{4})年(\d{2})月(\d{2})日", date_str).groups()
-            return datetime(year=int(year), month=int(month or 1), day=int(day or 1))
-        return datetime.utcfromtimestamp(0)
+        date = util.get_date(date_str) if date_str else None
+        return date if date else datetime.utcfromtimestamp(0)
 
     @property  # of self.size
     def size(self) -> int:
-        if self._size < 0:
-            self._size = self.extract_size()
-        return self._size
+        return self._get_lazy("_size", self.extract_size)
 
     @size.setter
     def size(self, size: int):
         self._size = size
 
+    @observe_extract
     def extract_size(self) -> int:
         soup = self.get_soup()
         size_soup = self._get_select_work_outline_soup(soup, "ファイル容量")
@@ -142,27 +287,22 @@ class DLSite_Product:
 
     @property  # of self.product_type
     def product_type(self) -> DLSite_Type:
-        if self._type == DLSite_Type.UNKNOWN:
-            self._type, self._type_kw = self.extract_type()
-        return self._type
+        return self._get_lazy("_type", self.extract_type)[0]
 
     @product_type.setter
     def product_type(self, product_type: DLSite_Type):
-        self._type, self._type_kw = (
-            product_type,
-            str(list(DLSite_Type_Info[product_type]["keyword"].gets())[0]),
-        )
+        keyword = next(iter(DLSite_Type_Info[product_type]["keyword"]))
+        self._type = product_type, keyword if keyword else ""
 
     @property  # of self.product_type_keyword
     def product_type_keyword(self) -> str:
-        if not self._type:
-            self._type, self._type_kw = self.extract_type()
-        return self._type_kw
+        return self._get_lazy("_type", self.extract_type)[1]
 
     @product_type_keyword.setter
     def product_type_keyword(self, product_type_keyword: str):
-        self._type, self._type_kw = self._extract_type(product_type_keyword)
+        self._type = self._extract_type(product_type_keyword)
 
+    @observe_extract
     def extract_type(self) -> Tuple[DLSite_Type, str]:
         soup = self.get_soup()
         type_soup = self._get_select_work_outline_soup(soup, "作品形式")
@@ -177,23 +317,17 @@ class DLSite_Product:
         return type_, type_keyword
 
     def _extract_type(self, type_keyword: str) -> Tuple[DLSite_Type, str]:
-        type_ = DLSite_Type.OTHER
-        for ty, info in DLSite_Type_Info.items():
-            if type_keyword.upper() in info["keyword"]:
-                type_ = ty
-                break
-        return type_, type_keyword.upper()
+        return get_type(type_keyword), type_keyword.upper()
 
     @property  # of rate
     def rate(self) -> DLSite_Rate:
-        if self._rate == DLSite_Rate.UNKNOWN:
-            self._rate = self.extract_rate()
-        return self._rate
+        return self._get_lazy("_rate", self.extract_rate)
 
     @rate.setter
     def rate(self, rate: DLSite_Rate):
         self._rate = rate
 
+    @observe_extract
     def extract_rate(self) -> DLSite_Rate:
         soup = self.get_soup()
         rate_soup = self._get_select_work_outline_soup(soup, "年齢指定")
@@ -203,11 +337,7 @@ class DLSite_Product:
                 rate_keyword: str = rate_soup.span["class"][0].split("_")[-1].strip()
             except (KeyError, IndexError, AttributeError):
                 return rate
-
-            for rt, info in DLSite_Rate_Info.items():
-                if rate_keyword in info["keyword"]:
-                    rate = rt
-                    break
+            rate = get_rate(rate_keyword)
         return rate
 
     # TODO That sh*t is big
@@ -217,14 +347,13 @@ class DLSite_Product:
 
     @property  # of tags
     def tags(self) -> List[Dict[str, Union[int, str]]]:
-        if not self._tags:
-            self._tags = self.extract_tags()
-        return self._tags
+        return self._get_lazy("_tags", self.extract_tags)
 
     @tags.setter
     def tags(self, tags: List[Dict[str, Union[int, str]]]):
         self._tags = tags
 
+    @observe_extract
     def extract_tags(self) -> List[Dict[str, Union[int, str]]]:
         soup = self.get_soup()
         tags_soup = self._get_select_work_outline_soup(soup, "ジャンル")
@@ -232,7 +361,7 @@ class DLSite_Product:
         for a in tags_soup.find_all("a") if tags_soup else []:
             try:
                 tag_name: str = a.get_text(strip=True)
-                tag_id: int = int(re.findall(r"\d{3}", a["href"])[0])
+                tag_id: int = int(_REGEX_TAG_ID.findall(a["href"])[0])
                 tags.append({"id": tag_id, "name": tag_name})
             except (KeyError, IndexError, AttributeError):
                 continue
@@ -241,14 +370,13 @@ class DLSite_Product:
 
     @property  # of img_links
     def img_links(self) -> List[str]:
-        if not self._img_links:
-            self._img_links = self.extract_img_links()
-        return self._img_links
+        return self._get_lazy("_img_links", self.extract_img_links)
 
     @img_links.setter
     def img_links(self, img_links: List[str]):
         self._img_links = img_links
 
+    @observe_extract
     def extract_img_links(self) -> List[str]:
         soup = self.get_soup()
         img_links_soup = soup.find(class_="product-slider-data")
@@ -264,10 +392,9 @@ class DLSite_Product:
 
     @property  # of rank
     def rank(self) -> dict:
-        if not self._rank:
-            self._rank = self.extract_rank()
-        return self._rank
+        return self._get_lazy("_rank", self.extract_rank)
 
+    @observe_extract
     def extract_rank(self) -> dict:
         product_rest = self.get_product_rest()
 
@@ -279,17 +406,11 @@ class DLSite_Product:
 
         rankings = []
         for r in product_rest["rank"] if product_rest["rank"] else []:
-            _type, _ = self._extract_type("_" + r["category"])
-            year, month, day = re.match(
-                r"(\d{4})-?(\d{2})?-?(\d{2})?", r["rank_date"]
-            ).groups()
             rankings.append(
                 {
                     "term": r["term"],
-                    "category": _type,
-                    "rank_date": datetime(
-                        year=int(year), month=int(month or 1), day=int(day or 1)
-                    ),
+                    "category": get_category_type(r["category"]),
+                    "rank_date": util.get_iso_date(r["rank_date"]),
                 }
             )
 
@@ -298,11 +419,16 @@ class DLSite_Product:
 
     @property  # of info
     def info(self) -> dict:
-        if not self._info:
-            self._info = self.extract_info()
-        return self._info
+        return self._get_lazy("_info", self.extract_info)
 
-    def extract_info(self) -> dict:
+    @property  # of sale_info
+    def sale_info(self) -> dict:
+        return self._get_lazy(
+            "_sale_info", lambda: self.extract_info(addition_info=False)
+        )
+
+    @observe_extract
+    def extract_info(self, addition_info: bool = True) -> dict:
         product_info = {}
 
         product_rest = self.get_product_rest()
@@ -322,6 +448,8 @@ class DLSite_Product:
                 "wishlist_count": wishlist_count,
             }
         )
+        if not addition_info:
+            return product_info
 
         def get_link(soup: BeautifulSoup) -> Tuple[str, str]:
             if type(soup) is NavigableString:
@@ -361,7 +489,7 @@ class DLSite_Product:
                         continue
                     kw_info.append(
                         {
-                            "title": re.sub(r"^[/ ]*|[/ ]*$", "", link_title),
+                            "title": _REGEX_INFO_TITLE.sub("", link_title),
                             "link": link,
                         }
                     )
@@ -374,26 +502,68 @@ class DLSite_Product:
 
     @property  # of update_log
     def update_logs(self) -> List[Dict[str, Any]]:
-        if not self._update_logs:
-            self._update_logs = self.extract_update_logs()
-        return self._update_logs
-
-    def extract_update_logs(self) -> List[Dict[str, Any]]:
-        update_logs = []
+        return self._get_lazy("_update_logs", self.extract_update_logs)
+
+    @observe_extract
+    def extract_update_logs(self, prefetch: int = 4) -> List[Dict[str, Any]]:
+        return list(self.iter_update_logs(prefetch=prefetch))
+
+    def iter_update_logs(
+        self, prefetch: int = 4, since: datetime = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield update logs from newest, next revision ajax pages are requested `prefetch` pages ahead.
+        Stop at first log older than `since`, for incremental sync of already stored logs.
+        Dates are days, logs dated `since` are yielded again and left to the caller to dedup.
+        """
         # For first update logs page
         soup = self.get_soup()
+        for update_log in self._extract_update_logs_soup(soup):
+            if since and update_log["date"] < since:
+                return
+            yield update_log
+
+        # For next update log page
+        if not soup.find(class_="version_up_more"):
+            return
+        pending = deque()
+        next_page = 2
+        with ThreadPoolExecutor(max_workers=max(prefetch, 1)) as executor:
+            try:
+                while True:
+                    while len(pending) < max(prefetch, 1):
+                        pending.append(
+                            executor.submit(self._get_update_logs_page, next_page)
+                        )
+                        next_page += 1
+                    content_json = pending.popleft().result()
+                    for update_log in self._extract_update_logs_json(content_json):
+                        if since and update_log["date"] < since:
+                            return
+                        yield update_log
+
+                    if not content_json["more"]:
+                        return
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _get_update_logs_page(self, page: int) -> dict:
+        url, params = self._get_update_logs_request(page)
+        content = self.get_content(url, method="POST", params=params)
+        return json.loads(content)
+
+    def _extract_update_logs_soup(self, soup: BeautifulSoup) -> List[Dict[str, Any]]:
+        update_logs = []
         update_soup = soup.find(class_="work_article version_up")
         for li in update_soup.find_all("li") if update_soup else []:
             if not li:
                 continue
             try:
-                _log = li.dl.find_all(re.compile(r"^d"))
-                year, month, day = re.match(
-                    r"(\d{4})年(\d{2})月(\d{2})日", _log[0].get_text(strip=True)
-                ).groups()
-                update_date = datetime(
-                    year=int(year), month=int(month or 1), day=int(day or 1)
-                )
+                _log = li.dl.find_all(_REGEX_DL_ITEM)
+                update_date = util.get_date(_log[0].get_text(strip=True))
+                if not update_date:
+                    continue
                 update_type = [s.get_text(strip=True) for s in _log[1].find_all("span")]
                 update_detail = _log[2].get_text(strip=True)
             except (KeyError, IndexError, AttributeError):
@@ -401,39 +571,89 @@ class DLSite_Product:
             update_logs.append(
                 {"date": update_date, "type": update_type, "detail": update_detail}
             )
+        return update_logs
 
-        # For next update log page
-        if soup.find(class_="version_up_more"):
-            url = "https://www.dlsite.com/maniax/product/revision/ajax"
-            page = 2
-            while True:
-                params = {"act": "show", "product_id": self.id, "page": page}
-                content = self.get_content(url, method="POST", params=params)
-                content_json = json.loads(content)
-                for _log in content_json["list"]:
-                    year, month, day = re.match(
-                        r"(\d{4})年(\d{2})月(\d{2})日", _log["release_date"]
-                    ).groups()
-                    update_date = datetime(
-                        year=int(year), month=int(month or 1), day=int(day or 1)
-                    )
-                    update_type = _log["content_update_type"]
-                    update_detail = _log["info"]
-                    update_logs.append(
-                        {
-                            "date": update_date,
-                            "type": update_type,
-                            "detail": update_detail,
-                        }
-                    )
+    def _extract_update_logs_json(self, content_json: dict) -> List[Dict[str, Any]]:
+        update_logs = []
+        for _log in content_json["list"]:
+            update_date = util.get_date(_log["release_date"])
+            if not update_date:
+                continue
+            update_type = _log["content_update_type"]
+            update_detail = _log["info"]
+            update_logs.append(
+                {"date": update_date, "type": update_type, "detail": update_detail}
+            )
+        return update_logs
 
-                if not content_json["more"]:
-                    break
-                page += 1
+    def to_record(self, rest: bool = True) -> ProductRecord:
+        """
+        Return `ProductRecord` of copies of extracted fields, `rank` and `info` are left `None` if not `rest`.
+        """
+        maker = self.maker
+        return ProductRecord(
+            id=self.id,
+            name=self.name,
+            maker_id=maker.id if maker else None,
+            maker_name=maker.name if maker else "",
+            date=self.date,
+            size=self.size,
+            type=self.product_type,
+            type_keyword=self.product_type_keyword,
+            rate=self.rate,
+            tags=copy.deepcopy(self.tags),
+            img_links=self.img_links,
+            rank=copy.deepcopy(self.rank) if rest else None,
+            info=copy.deepcopy(self.info) if rest else None,
+        )
 
-        return update_logs
+    @classmethod
+    def from_record(
+        cls, record: ProductRecord, transport: DLSite_Transport = None
+    ) -> "DLSite_Product":
+        """
+        Return lazy `DLSite_Product` with copies of fields of `record`, without fetching or parsing.
+        """
+        product = cls(record.id, lazy=True, transport=transport)
+        product._name = record.name
+        product._maker = None
+        if record.maker_id:
+            product._maker = get_maker(record.maker_id, transport=product.transport)
+            if record.maker_name:
+                product._maker.name = record.maker_name
+        product._date = record.date
+        product._size = record.size
+        product._type = record.type, record.type_keyword
+        product._rate = record.rate
+        product._tags = copy.deepcopy(record.tags)
+        product._img_links = list(record.img_links)
+        if record.rank is not None:
+            product._rank = copy.deepcopy(record.rank)
+        if record.info is not None:
+            product._info = copy.deepcopy(record.info)
+        return product
+
+    @classmethod
+    def from_store(
+        cls, id_code: str, store: DLSite_Store, transport: DLSite_Transport = None
+    ) -> Union["DLSite_Product", None]:
+        """
+        Return `DLSite_Product` of `id_code` hydrated from `store`, or `None` if not stored.
+        """
+        record = store.load(id_code)
+        return cls.from_record(record, transport=transport) if record else None
+
+    def to_store(self, store: DLSite_Store, rest: bool = True):
+        store.upsert(self.to_record(rest=rest))
+
+    def release_soup(self):
+        """
+        Drop parsed soup and raw ajax json, fields that were not extracted yet will be fetched again.
+        """
+        self._soup = None
+        self._work_outline = None
+        self._product_rest = {}
 
-    # TODO
     def get_content(
         self,
         url: str,
@@ -441,7 +661,7 @@ class DLSite_Product:
         headers: dict = {},
         params: dict = {},
     ) -> bytes:
-        resp = requests.request(method, url, headers=headers, params=params)
+        resp = self.transport.request(method, url, headers=headers, params=params)
         if resp.ok and resp.content:
             return resp.content
         elif resp.status_code == 404:
@@ -450,27 +670,136 @@ class DLSite_Product:
             raise ValueError("get_content requests Error.")
 
     def get_product_rest(self, update: bool = False) -> dict:
-        if not (self._product_rest) or update:
-            url = f"{BASE_URL}/maniax/product/info/ajax?product_id={self.id}"
-            content = self.get_content(url)
-            product_json = json.loads(content)
-            self._product_rest: dict = product_json[self.id]
+        if self._product_rest and not update:
+            return self._product_rest
+        with self._lock if self._lock else nullcontext():
+            if not (self._product_rest) or update:
+                refresh = update or bool(self._product_rest)
+                url, params = self._get_product_rest_request()
+                content = self.get_content(url, params=params)
+                product_json = json.loads(content)
+                self._set_product_rest(product_json[self.id], invalidate=refresh)
         return self._product_rest
 
+    def _set_product_rest(self, product_rest: dict, invalidate: bool = True):
+        self._product_rest = product_rest
+        if invalidate:
+            self.invalidate(source="rest")
+
+    @classmethod
+    def fetch_rest_many(
+        cls,
+        products: Iterable[Union["DLSite_Product", str]],
+        chunk_size: int = 50,
+        transport: DLSite_Transport = None,
+    ) -> List["DLSite_Product"]:
+        """
+        Fill `_product_rest` of every product in `products` using one `product/info/ajax` request per `chunk_size` ids.
+        Plain id codes or urls in `products` are turned into lazy `DLSite_Product`.
+        Products missing from the ajax response are left unfilled.
+        """
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be positive, but got {chunk_size}")
+        products = list(products)
+        invalid = [
+            p
+            for p in products
+            if not isinstance(p, DLSite_Product) and not util.get_id_code(p, "RJ")
+        ]
+        if invalid:
+            raise ValueError(f"No RJ id code in {invalid}")
+        products = [
+            p if isinstance(p, DLSite_Product) else cls(p, lazy=True, transport=transport)
+            for p in products
+        ]
+        for i in range(0, len(products), chunk_size):
+            chunk = products[i : i + chunk_size]
+            url, params = chunk[0]._get_product_rest_request()
+            params["product_id"] = ",".join(dict.fromkeys(p.id for p in chunk))
+            content = chunk[0].get_content(url, params=params)
+            product_json = json.loads(content)
+            if not isinstance(product_json, dict):
+                # DLsite answers `[]` when none of the ids is found
+                product_json = {}
+            for product in chunk:
+                if product.id in product_json:
+                    product._set_product_rest(product_json[product.id])
+        return products
+
     def get_soup(self, content: bytes = None, update: bool = False) -> BeautifulSoup:
-        if not (self._soup) or content or update:
-            url = f"{BASE_URL}/maniax/work/=/product_id/{self.id}"
-            content = content if content else self.get_content(url)
-            self._soup = BeautifulSoup(content, "lxml")
+        if self._soup and not (content or update):
+            return self._soup
+        with self._lock if self._lock else nullcontext():
+            if not (self._soup) or content or update:
+                # Fields extracted from a replaced page are stale, first parse keeps hydrated fields
+                refresh = bool(self._soup) or bool(content) or update
+                content = content if content else self.get_content(self._get_work_url())
+                observer = self.observer
+                nbytes = len(content)
+                start = time.perf_counter()
+                if self.partial_parse:
+                    content = get_product_regions(content)
+                self._soup = BeautifulSoup(content, "lxml")
+                if observer.enabled:
+                    kind = "work_partial" if self.partial_parse else "work"
+                    observer.on_parse(kind, nbytes, time.perf_counter() - start)
+                self._work_outline = None
+                if refresh:
+                    self.invalidate(source="html")
         return self._soup
 
+    def invalidate(self, fields: Iterable[str] = None, source: str = None):
+        """
+        Forget memoized `fields`, or all fields extracted from `source` ("html", "rest" or "revision").
+        They are extracted again on next access.
+        """
+        if fields is None:
+            fields = [f for f, sources in FIELD_SOURCES.items() if source in sources]
+        for field in fields:
+            setattr(self, FIELD_ATTRS[field], _UNSET)
+
+    def _get_lazy(self, attr: str, extract: Callable[[], Any]) -> Any:
+        value = getattr(self, attr)
+        if value is not _UNSET:
+            return value
+        if self._lock is None:
+            value = extract()
+            setattr(self, attr, value)
+            return value
+        with self._lock:
+            # Another thread may have computed it while waiting
+            value = getattr(self, attr)
+            if value is _UNSET:
+                value = extract()
+                setattr(self, attr, value)
+            return value
+
+    @property
+    def observer(self) -> DLSite_Observer:
+        return self.transport.observer
+
+    def _get_work_url(self) -> str:
+        return f"{BASE_URL}/maniax/work/=/product_id/{self.id}"
+
+    def _get_product_rest_request(self) -> Tuple[str, dict]:
+        return f"{BASE_URL}/maniax/product/info/ajax", {"product_id": self.id}
+
+    def _get_update_logs_request(self, page: int) -> Tuple[str, dict]:
+        url = f"{BASE_URL}/maniax/product/revision/ajax"
+        return url, {"act": "show", "product_id": self.id, "page": page}
+
     def _get_select_work_outline_soup(
         self, soup: BeautifulSoup, select_keyword: str
-    ) -> Union[BeautifulSoup, None]:
+    ) -> Union[Tag, None]:
         return self._get_work_outline_soup(soup).get(select_keyword, None)
 
-    def _get_work_outline_soup(self, soup: BeautifulSoup) -> Dict[str, BeautifulSoup]:
-        work_outline_soup = {}
+    def _get_work_outline_soup(self, soup: BeautifulSoup) -> Dict[str, Tag]:
+        # The `th -> td` index is built once per parsed page and reset by `get_soup`
+        if soup is self._soup and self._work_outline is not None:
+            return self._work_outline
+        work_outline_soup: Dict[str, Tag] = {}
         for tr in soup.find(id="work_outline").find_all("tr"):
             work_outline_soup.update({tr.th.get_text(strip=True): tr.td})
+        if soup is self._soup:
+            self._work_outline = work_outline_soup
         return work_outline_soup
@@ -0,0 +1,202 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Union
+
+import util
+
+# Requests per second of each `util.get_url_class` endpoint, scaled by `AIMDScheduler.scale` if any
+DEFAULT_BUDGETS = {
+    "work": 2.0,
+    "info": 5.0,
+    "revision": 2.0,
+    "maker": 1.0,
+    "image": 8.0,
+    "other": 2.0,
+}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled with `rate` tokens per second up to `burst` tokens.
+    """
+
+    def __init__(self, rate: float, burst: float = None) -> None:
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, but got {rate}")
+        self.rate = rate
+        self.burst = burst if burst else max(rate, 1.0)
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Take `tokens` now and return seconds to wait before using them.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            self._tokens -= tokens
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def set_rate(self, rate: float):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, but got {rate}")
+        with self._lock:
+            # Tokens refilled so far are earned at the old rate
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            self.rate = rate
+
+    def acquire(self, tokens: float = 1.0):
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def async_acquire(self, tokens: float = 1.0):
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class AIMDScheduler:
+    """
+    Concurrency limit raised by `increase` per round of successful requests
+    and multiplied by `decrease` on 429/5xx, errors or latency above `latency_threshold`.
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 64,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_threshold: float = 5.0,
+    ) -> None:
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_threshold = latency_threshold
+
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._decreased_at = 0.0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return max(self.minimum, int(self._limit))
+
+    @property
+    def scale(self) -> float:
+        """
+        Current limit relative to `initial`, used to scale request rates.
+        """
+        return self._limit / self.initial
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify()
+
+    def record(self, status: Union[int, None], latency: float):
+        """
+        Report outcome of a request, `status` is `None` if it failed without response.
+        """
+        overloaded = (
+            status is None
+            or status == 429
+            or status >= 500
+            or latency > self.latency_threshold
+        )
+        with self._condition:
+            if overloaded:
+                now = time.monotonic()
+                # Decrease once per congestion event, not once per in-flight request
+                if now - self._decreased_at > latency:
+                    self._limit = max(self.minimum, self._limit * self.decrease)
+                    self._decreased_at = now
+            else:
+                self._limit = min(self.maximum, self._limit + self.increase / self._limit)
+                self._condition.notify_all()
+
+
+class DLSite_RateLimiter:
+    """
+    Shared per endpoint token buckets with an optional `AIMDScheduler` over all requests.
+    With a scheduler, `budgets` are starting rates multiplied by its `scale`,
+    so rates grow while DLsite answers well and halve on 429/5xx.
+    """
+
+    def __init__(
+        self,
+        budgets: Dict[str, float] = None,
+        burst: float = None,
+        scheduler: AIMDScheduler = None,
+    ) -> None:
+        budgets = dict(DEFAULT_BUDGETS, **(budgets if budgets else {}))
+        self.budgets = budgets
+        self._scale = 1.0
+        self.buckets = {
+            url_class: TokenBucket(rate, burst) for url_class, rate in budgets.items()
+        }
+        self.scheduler = scheduler
+
+    def get_bucket(self, url: str) -> TokenBucket:
+        url_class = util.get_url_class(url)
+        return self.buckets.get(url_class, self.buckets["other"])
+
+    @contextmanager
+    def slot(self, url: str) -> Iterator[None]:
+        """
+        Wait for budget of `url` endpoint, then for a scheduler slot held while requesting.
+        """
+        # Budget first, a slot held while waiting for it would stall every other endpoint
+        self.get_bucket(url).acquire()
+        if self.scheduler is None:
+            yield
+            return
+        with self.scheduler.slot():
+            yield
+
+    def acquire(self, url: str):
+        self.get_bucket(url).acquire()
+
+    async def async_acquire(self, url: str):
+        await self.get_bucket(url).async_acquire()
+
+    def record(self, status: Union[int, None], latency: float):
+        """
+        Report outcome of a sync or async request to the scheduler and rescale bucket rates.
+        """
+        if self.scheduler is None:
+            return
+        self.scheduler.record(status, latency)
+        scale = self.scheduler.scale
+        if scale != self._scale:
+            self._scale = scale
+            for url_class, bucket in self.buckets.items():
+                bucket.set_rate(self.budgets[url_class] * scale)
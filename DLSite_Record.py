@@ -0,0 +1,135 @@
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Union
+
+from DLSite_Enum import DLSite_Rate, DLSite_Type
+
+
+class ProductRecord:
+    """
+    Immutable extracted fields of a `DLSite_Product` without soup or raw ajax json.
+    """
+
+    __slots__ = (
+        "id",
+        "name",
+        "maker_id",
+        "maker_name",
+        "date",
+        "size",
+        "type",
+        "type_keyword",
+        "rate",
+        "tags",
+        "img_links",
+        "rank",
+        "info",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        name: str = "",
+        maker_id: Union[str, None] = None,
+        maker_name: str = "",
+        date: Union[datetime, None] = None,
+        size: int = -1,
+        type: DLSite_Type = DLSite_Type.UNKNOWN,
+        type_keyword: str = "",
+        rate: DLSite_Rate = DLSite_Rate.UNKNOWN,
+        tags: List[Dict[str, Union[int, str]]] = (),
+        img_links: List[str] = (),
+        rank: Union[dict, None] = None,
+        info: Union[dict, None] = None,
+    ) -> None:
+        _set = object.__setattr__
+        _set(self, "id", id)
+        _set(self, "name", name)
+        _set(self, "maker_id", maker_id)
+        _set(self, "maker_name", maker_name)
+        _set(self, "date", date)
+        _set(self, "size", size)
+        _set(self, "type", type)
+        _set(self, "type_keyword", type_keyword)
+        _set(self, "rate", rate)
+        _set(self, "tags", list(tags))
+        _set(self, "img_links", list(img_links))
+        _set(self, "rank", rank)
+        _set(self, "info", info)
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        return (type(self), tuple(getattr(self, f) for f in self.__slots__))
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, ProductRecord):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(id={self.id!r}, name={self.name!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Return JSON compatible dict, enums are stored by name and datetimes as ISO 8601 string.
+        """
+        rank = None
+        if self.rank is not None:
+            rank = dict(self.rank)
+            rank["rankings"] = [
+                {
+                    "term": r["term"],
+                    "category": r["category"].name,
+                    "rank_date": r["rank_date"].isoformat(),
+                }
+                for r in self.rank["rankings"]
+            ]
+        return {
+            "id": self.id,
+            "name": self.name,
+            "maker_id": self.maker_id,
+            "maker_name": self.maker_name,
+            "date": self.date.isoformat() if self.date else None,
+            "size": self.size,
+            "type": self.type.name,
+            "type_keyword": self.type_keyword,
+            "rate": self.rate.name,
+            "tags": self.tags,
+            "img_links": self.img_links,
+            "rank": rank,
+            "info": self.info,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ProductRecord":
+        data = dict(data)
+        if data.get("date"):
+            data["date"] = datetime.fromisoformat(data["date"])
+        if "type" in data:
+            data["type"] = DLSite_Type[data["type"]]
+        if "rate" in data:
+            data["rate"] = DLSite_Rate[data["rate"]]
+        if data.get("rank") is not None:
+            rank = dict(data["rank"])
+            rank["rankings"] = [
+                {
+                    "term": r["term"],
+                    "category": DLSite_Type[r["category"]],
+                    "rank_date": datetime.fromisoformat(r["rank_date"]),
+                }
+                for r in rank["rankings"]
+            ]
+            data["rank"] = rank
+        return cls(**data)
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text: Union[str, bytes]) -> "ProductRecord":
+        return cls.from_dict(json.loads(text))
@@ -0,0 +1,230 @@
+import bisect
+import itertools
+import json
+import sys
+import threading
+import time
+import zlib
+from array import array
+from typing import Dict, Iterable, List, Tuple, Union
+
+from DLSite_Discovery import chunked
+from DLSite_Product import DLSite_Product
+from DLSite_Transport import DLSite_Transport
+
+# Integer fields sampled from product info ajax json, rate is `rate_average_2dp` * 100
+# and rank is the best rank of all ranking terms or 0 if not ranked
+SERIES_FIELDS = ("price", "dl_count", "wishlist_count", "rate", "on_sale", "rank")
+
+
+def get_sample(product_rest: dict) -> Tuple[int, ...]:
+    """
+    Return values of `SERIES_FIELDS` from product info ajax json.
+    """
+    ranks = [r["rank"] for r in product_rest.get("rank") or [] if r.get("rank")]
+    return (
+        int(product_rest.get("price") or 0),
+        int(product_rest.get("dl_count") or 0),
+        int(product_rest.get("wishlist_count") or 0),
+        round((product_rest.get("rate_average_2dp") or 0) * 100),
+        int(bool(product_rest.get("on_sale"))),
+        min(ranks) if ranks else 0,
+    )
+
+
+class ProductSeries:
+    """
+    Samples of one product, timestamps and every field are stored as deltas in `array("q")`.
+    """
+
+    __slots__ = ("deltas", "_last")
+
+    def __init__(self) -> None:
+        # deltas[0] is timestamps, then one array per field of `SERIES_FIELDS`
+        self.deltas: List[array] = [array("q") for _ in range(len(SERIES_FIELDS) + 1)]
+        self._last = (0,) * (len(SERIES_FIELDS) + 1)
+
+    def append(self, timestamp: int, sample: Tuple[int, ...]):
+        values = (int(timestamp),) + tuple(sample)
+        if self.deltas[0] and values[0] < self._last[0]:
+            raise ValueError(f"timestamp {values[0]} is older than last sample {self._last[0]}")
+        for deltas, value, last in zip(self.deltas, values, self._last):
+            deltas.append(value - last)
+        self._last = values
+
+    def __len__(self) -> int:
+        return len(self.deltas[0])
+
+    def get_timestamps(self) -> List[int]:
+        return list(itertools.accumulate(self.deltas[0]))
+
+    def get_values(self, field: str) -> List[int]:
+        return list(itertools.accumulate(self.deltas[SERIES_FIELDS.index(field) + 1]))
+
+    def get_range(
+        self, field: str, start: int = None, end: int = None
+    ) -> List[Tuple[int, int]]:
+        """
+        Return `(timestamp, value)` samples of `field` with `start <= timestamp <= end`.
+        """
+        timestamps = self.get_timestamps()
+        lo = bisect.bisect_left(timestamps, start) if start is not None else 0
+        hi = bisect.bisect_right(timestamps, end) if end is not None else len(timestamps)
+        values = self.get_values(field)
+        return list(zip(timestamps[lo:hi], values[lo:hi]))
+
+
+class DLSite_Series:
+    """
+    Time series of `SERIES_FIELDS` per product id.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.series: Dict[str, ProductSeries] = {}
+
+    def record(self, product_id: str, product_rest: dict, timestamp: int = None):
+        timestamp = int(time.time()) if timestamp is None else timestamp
+        sample = get_sample(product_rest)
+        with self._lock:
+            series = self.series.get(product_id)
+            if series is None:
+                series = self.series[product_id] = ProductSeries()
+            series.append(timestamp, sample)
+
+    def get_range(
+        self, product_id: str, field: str, start: int = None, end: int = None
+    ) -> List[Tuple[int, int]]:
+        series = self.series.get(product_id)
+        return series.get_range(field, start, end) if series else []
+
+    def get_velocity(
+        self, product_id: str, field: str = "dl_count", start: int = None, end: int = None
+    ) -> float:
+        """
+        Return change of `field` per day between first and last samples in range.
+        """
+        samples = self.get_range(product_id, field, start, end)
+        if len(samples) < 2 or samples[-1][0] == samples[0][0]:
+            return 0.0
+        (t0, v0), (t1, v1) = samples[0], samples[-1]
+        return (v1 - v0) * 86400 / (t1 - t0)
+
+    def get_on_sale_transitions(
+        self, start: int = None, end: int = None
+    ) -> List[Tuple[str, int, bool]]:
+        """
+        Return `(product_id, timestamp, on_sale)` of every on_sale change inside range.
+        """
+        transitions = []
+        for product_id, series in self.series.items():
+            # Nonzero on_sale delta is a transition, the first sample is not one
+            on_sale = series.deltas[SERIES_FIELDS.index("on_sale") + 1]
+            timestamps = None
+            for i in range(1, len(on_sale)):
+                if not on_sale[i]:
+                    continue
+                if timestamps is None:
+                    timestamps = series.get_timestamps()
+                if (start is None or timestamps[i] >= start) and (
+                    end is None or timestamps[i] <= end
+                ):
+                    transitions.append((product_id, timestamps[i], on_sale[i] > 0))
+        return transitions
+
+    def __len__(self) -> int:
+        return len(self.series)
+
+    def save(self, path: str, compress_level: int = 6):
+        """
+        Write all series zlib compressed to `path`.
+        """
+        with self._lock:
+            items = list(self.series.items())
+        header = {
+            "byteorder": sys.byteorder,
+            "fields": SERIES_FIELDS,
+            "products": [(product_id, len(series)) for product_id, series in items],
+        }
+        body = b"".join(d.tobytes() for _, series in items for d in series.deltas)
+        data = json.dumps(header).encode("utf-8") + b"\n" + body
+        with open(path, "wb") as f:
+            f.write(zlib.compress(data, compress_level))
+
+    @classmethod
+    def load(cls, path: str) -> "DLSite_Series":
+        with open(path, "rb") as f:
+            data = zlib.decompress(f.read())
+        header_line, _, body = data.partition(b"\n")
+        header = json.loads(header_line)
+        if tuple(header["fields"]) != SERIES_FIELDS:
+            raise ValueError(f"fields {header['fields']} of {path} are not {SERIES_FIELDS}")
+
+        series_map = cls()
+        offset = 0
+        for product_id, length in header["products"]:
+            series = ProductSeries()
+            for deltas in series.deltas:
+                nbytes = length * deltas.itemsize
+                deltas.frombytes(body[offset : offset + nbytes])
+                if header["byteorder"] != sys.byteorder:
+                    deltas.byteswap()
+                offset += nbytes
+            series._last = tuple(sum(d) for d in series.deltas)
+            series_map.series[product_id] = series
+        return series_map
+
+
+class DLSite_Poller:
+    """
+    Sample product info ajax json of `product_ids` into `series` every `interval` seconds.
+    Give a `transport` without cache, cached json would repeat old samples.
+    """
+
+    def __init__(
+        self,
+        series: DLSite_Series,
+        product_ids: Iterable[str],
+        interval: float = 60 * 60,
+        chunk_size: int = 50,
+        transport: DLSite_Transport = None,
+    ) -> None:
+        self.series = series
+        self.product_ids = list(dict.fromkeys(product_ids))
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.transport = transport
+        self._stop = threading.Event()
+
+    def poll_once(self, timestamp: int = None) -> int:
+        """
+        Sample every product once, return number of products sampled.
+        """
+        timestamp = int(time.time()) if timestamp is None else timestamp
+        count = 0
+        # Keep only one window of lazy products alive at a time
+        for ids in chunked(self.product_ids, self.chunk_size * 20):
+            products = DLSite_Product.fetch_rest_many(
+                ids, chunk_size=self.chunk_size, transport=self.transport
+            )
+            for product in products:
+                if product._product_rest:
+                    self.series.record(product.id, product._product_rest, timestamp)
+                    count += 1
+        return count
+
+    def run(self, iterations: Union[int, None] = None):
+        """
+        Poll until `stop` is called or `iterations` polls are done, keeping `interval` between starts.
+        """
+        self._stop.clear()
+        for i in itertools.count(1):
+            started_at = time.monotonic()
+            self.poll_once()
+            if iterations is not None and i >= iterations:
+                break
+            if self._stop.wait(max(0.0, self.interval - (time.monotonic() - started_at))):
+                break
+
+    def stop(self):
+        self._stop.set()
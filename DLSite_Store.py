@@ -0,0 +1,152 @@
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Iterable, List, Union
+
+import util
+from DLSite_Enum import DLSite_Rate, DLSite_Type
+from DLSite_Record import ProductRecord
+
+
+class DLSite_Store:
+    """
+    SQLite store of `ProductRecord`, indexed by tag, maker, type, rate, date and price.
+    """
+
+    def __init__(self, path: str = "dlsite_store.sqlite") -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS product (
+                    id TEXT PRIMARY KEY,
+                    id_num INTEGER,
+                    name TEXT NOT NULL,
+                    maker_id TEXT,
+                    date TEXT,
+                    size INTEGER NOT NULL,
+                    type TEXT NOT NULL,
+                    rate TEXT NOT NULL,
+                    price INTEGER,
+                    record TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS product_tag (
+                    product_id TEXT NOT NULL,
+                    tag_id INTEGER NOT NULL,
+                    PRIMARY KEY (product_id, tag_id)
+                );
+                CREATE INDEX IF NOT EXISTS product_maker_id ON product (maker_id);
+                CREATE INDEX IF NOT EXISTS product_type ON product (type);
+                CREATE INDEX IF NOT EXISTS product_rate ON product (rate);
+                CREATE INDEX IF NOT EXISTS product_date ON product (date);
+                CREATE INDEX IF NOT EXISTS product_price ON product (price);
+                CREATE INDEX IF NOT EXISTS product_tag_tag_id ON product_tag (tag_id);
+                """
+            )
+
+    def upsert(self, record: ProductRecord):
+        self.upsert_many([record])
+
+    def upsert_many(self, records: Iterable[ProductRecord]):
+        """
+        Insert or replace all `records` in a single transaction.
+        """
+        with self._lock, self._conn:
+            for record in records:
+                info = record.info or {}
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO product VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        record.id,
+                        util.get_id_num(record.id, "RJ"),
+                        record.name,
+                        record.maker_id,
+                        record.date.isoformat() if record.date else None,
+                        record.size,
+                        record.type.name,
+                        record.rate.name,
+                        info.get("price"),
+                        record.to_json(),
+                    ),
+                )
+                self._conn.execute(
+                    "DELETE FROM product_tag WHERE product_id = ?", (record.id,)
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO product_tag VALUES (?, ?)",
+                    [(record.id, tag["id"]) for tag in record.tags],
+                )
+
+    def load(self, id_code: str) -> Union[ProductRecord, None]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record FROM product WHERE id = ?", (id_code.upper(),)
+            ).fetchone()
+        return ProductRecord.from_json(row[0]) if row else None
+
+    def load_many(self, id_codes: Iterable[str]) -> List[ProductRecord]:
+        return [r for r in (self.load(id_code) for id_code in id_codes) if r]
+
+    def query(
+        self,
+        tag_ids: Iterable[int] = (),
+        maker_id: str = None,
+        type_: DLSite_Type = None,
+        rate: DLSite_Rate = None,
+        date_from: datetime = None,
+        date_to: datetime = None,
+        price_min: int = None,
+        price_max: int = None,
+        limit: int = None,
+    ) -> List[str]:
+        """
+        Return id codes of products matching all given filters, having every tag of `tag_ids`.
+        """
+        where, args = [], []
+        tag_ids = list(dict.fromkeys(tag_ids))
+        if tag_ids:
+            where.append(
+                "id IN (SELECT product_id FROM product_tag WHERE tag_id IN ({})"
+                " GROUP BY product_id HAVING COUNT(*) = ?)".format(
+                    ", ".join("?" * len(tag_ids))
+                )
+            )
+            args.extend(tag_ids + [len(tag_ids)])
+        for column, op, value in (
+            ("maker_id", "=", maker_id),
+            ("type", "=", type_.name if type_ else None),
+            ("rate", "=", rate.name if rate else None),
+            ("date", ">=", date_from.isoformat() if date_from else None),
+            ("date", "<=", date_to.isoformat() if date_to else None),
+            ("price", ">=", price_min),
+            ("price", "<=", price_max),
+        ):
+            if value is not None:
+                where.append(f"{column} {op} ?")
+                args.append(value)
+
+        sql = "SELECT id FROM product"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id_num"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit)
+        with self._lock:
+            return [row[0] for row in self._conn.execute(sql, args)]
+
+    def delete(self, id_code: str):
+        id_code = id_code.upper()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM product WHERE id = ?", (id_code,))
+            self._conn.execute("DELETE FROM product_tag WHERE product_id = ?", (id_code,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM product").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,242 @@
+import json
+import sys
+import threading
+import zlib
+from array import array
+from typing import Dict, Iterable, List, Tuple, Union
+
+import util
+from DLSite_Enum import DLSite_Rate, DLSite_Type
+from DLSite_Product import DLSite_Product
+from DLSite_Record import ProductRecord
+
+
+class _Bitmap:
+    """
+    Bits of dense doc numbers, mutated in a `bytearray` and queried as an `int`.
+    """
+
+    __slots__ = ("bits", "_int")
+
+    def __init__(self, bits: bytearray = None) -> None:
+        self.bits = bits if bits is not None else bytearray()
+        self._int = None
+
+    def add(self, doc: int):
+        index = doc >> 3
+        if index >= len(self.bits):
+            self.bits.extend(bytes(max(index + 1 - len(self.bits), len(self.bits))))
+        self.bits[index] |= 1 << (doc & 7)
+        self._int = None
+
+    def discard(self, doc: int):
+        index = doc >> 3
+        if index < len(self.bits) and self.bits[index] & (1 << (doc & 7)):
+            self.bits[index] &= ~(1 << (doc & 7)) & 0xFF
+            self._int = None
+
+    def to_int(self) -> int:
+        # Whole bitmap AND/OR/NOT are single C loops on ints
+        if self._int is None:
+            self._int = int.from_bytes(self.bits, "little")
+        return self._int
+
+
+def _iter_docs(bits: int) -> Iterable[int]:
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    for index, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            yield (index << 3) + low.bit_length() - 1
+            byte ^= low
+
+
+class DLSite_TagIndex:
+    """
+    Inverted index of tag id, `DLSite_Type` and `DLSite_Rate` to product id numbers.
+    Products get dense doc numbers in insertion order so every bitmap stays compact.
+    """
+
+    def __init__(self, id_prefix: str = "RJ") -> None:
+        self.id_prefix = id_prefix
+        self._lock = threading.Lock()
+        self._doc_ids = array("q")
+        self._docs: Dict[int, int] = {}
+        self._live = _Bitmap()
+        self._tags: Dict[int, _Bitmap] = {}
+        self._types: Dict[DLSite_Type, _Bitmap] = {}
+        self._rates: Dict[DLSite_Rate, _Bitmap] = {}
+        self.tag_names: Dict[int, str] = {}
+
+    def add(self, product: Union[ProductRecord, DLSite_Product]):
+        """
+        Index tags, type and rate of `product`, replacing its previous entry.
+        """
+        if isinstance(product, DLSite_Product):
+            id_code, tags = product.id, product.tags
+            type_, rate = product.product_type, product.rate
+        else:
+            id_code, tags, type_, rate = product.id, product.tags, product.type, product.rate
+        id_num = util.get_id_num(id_code, self.id_prefix)
+        if id_num is None:
+            raise ValueError(f"{id_code} is not a {self.id_prefix} id code")
+
+        with self._lock:
+            doc = self._docs.get(id_num)
+            if doc is None:
+                doc = self._docs[id_num] = len(self._doc_ids)
+                self._doc_ids.append(id_num)
+            else:
+                self._discard(doc)
+            self._live.add(doc)
+            for tag in tags:
+                self.tag_names[tag["id"]] = tag["name"]
+                self._get_bitmap(self._tags, tag["id"]).add(doc)
+            self._get_bitmap(self._types, type_).add(doc)
+            self._get_bitmap(self._rates, rate).add(doc)
+
+    def add_many(self, products: Iterable[Union[ProductRecord, DLSite_Product]]):
+        for product in products:
+            self.add(product)
+
+    def remove(self, id_num: int):
+        with self._lock:
+            doc = self._docs.get(id_num)
+            if doc is not None:
+                self._discard(doc)
+                self._live.discard(doc)
+
+    def query(
+        self,
+        all_of: Iterable[int] = (),
+        any_of: Iterable[int] = (),
+        none_of: Iterable[int] = (),
+        type_: Union[DLSite_Type, Iterable[DLSite_Type]] = None,
+        rate: Union[DLSite_Rate, Iterable[DLSite_Rate]] = None,
+        limit: int = None,
+    ) -> List[int]:
+        """
+        Return id numbers of products having every tag of `all_of`, one of `any_of` and none of `none_of`,
+        with one of the given types and rates, in insertion order.
+        """
+        with self._lock:
+            bits = self._match(all_of, any_of, none_of, type_, rate)
+            docs = _iter_docs(bits)
+            if limit is not None:
+                docs = (doc for doc, _ in zip(docs, range(limit)))
+            return [self._doc_ids[doc] for doc in docs]
+
+    def count(
+        self,
+        all_of: Iterable[int] = (),
+        any_of: Iterable[int] = (),
+        none_of: Iterable[int] = (),
+        type_: Union[DLSite_Type, Iterable[DLSite_Type]] = None,
+        rate: Union[DLSite_Rate, Iterable[DLSite_Rate]] = None,
+    ) -> int:
+        with self._lock:
+            return bin(self._match(all_of, any_of, none_of, type_, rate)).count("1")
+
+    def __contains__(self, id_num: int) -> bool:
+        doc = self._docs.get(id_num)
+        return doc is not None and bool(self._live.to_int() >> doc & 1)
+
+    def __len__(self) -> int:
+        return bin(self._live.to_int()).count("1")
+
+    def save(self, path: str, compress_level: int = 6):
+        """
+        Write index zlib compressed to `path`.
+        """
+        with self._lock:
+            bitmaps = [("live", None, self._live)]
+            bitmaps += [("tag", k, b) for k, b in self._tags.items()]
+            bitmaps += [("type", k.name, b) for k, b in self._types.items()]
+            bitmaps += [("rate", k.name, b) for k, b in self._rates.items()]
+            header = {
+                "id_prefix": self.id_prefix,
+                "byteorder": sys.byteorder,
+                "docs": len(self._doc_ids),
+                "bitmaps": [(kind, key, len(b.bits)) for kind, key, b in bitmaps],
+                "tag_names": list(self.tag_names.items()),
+            }
+            body = self._doc_ids.tobytes() + b"".join(bytes(b.bits) for _, _, b in bitmaps)
+        data = json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n" + body
+        with open(path, "wb") as f:
+            f.write(zlib.compress(data, compress_level))
+
+    @classmethod
+    def load(cls, path: str) -> "DLSite_TagIndex":
+        with open(path, "rb") as f:
+            data = zlib.decompress(f.read())
+        header_line, _, body = data.partition(b"\n")
+        header = json.loads(header_line)
+
+        index = cls(id_prefix=header["id_prefix"])
+        index._doc_ids.frombytes(body[: header["docs"] * index._doc_ids.itemsize])
+        if header["byteorder"] != sys.byteorder:
+            index._doc_ids.byteswap()
+        index._docs = {id_num: doc for doc, id_num in enumerate(index._doc_ids)}
+        offset = header["docs"] * index._doc_ids.itemsize
+        for kind, key, nbytes in header["bitmaps"]:
+            bitmap = _Bitmap(bytearray(body[offset : offset + nbytes]))
+            offset += nbytes
+            if kind == "live":
+                index._live = bitmap
+            elif kind == "tag":
+                index._tags[key] = bitmap
+            elif kind == "type":
+                index._types[DLSite_Type[key]] = bitmap
+            elif kind == "rate":
+                index._rates[DLSite_Rate[key]] = bitmap
+        index.tag_names = {tag_id: name for tag_id, name in header["tag_names"]}
+        return index
+
+    def _match(
+        self,
+        all_of: Iterable[int],
+        any_of: Iterable[int],
+        none_of: Iterable[int],
+        type_: Union[DLSite_Type, Iterable[DLSite_Type], None],
+        rate: Union[DLSite_Rate, Iterable[DLSite_Rate], None],
+    ) -> int:
+        bits = self._live.to_int()
+        for tag_id in all_of:
+            bits &= self._get_int(self._tags, tag_id)
+        any_of = list(any_of)
+        if any_of:
+            bits &= self._union(self._tags, any_of)
+        for tag_id in none_of:
+            bits &= ~self._get_int(self._tags, tag_id)
+        if type_ is not None:
+            bits &= self._union(self._types, _as_tuple(type_))
+        if rate is not None:
+            bits &= self._union(self._rates, _as_tuple(rate))
+        return bits
+
+    def _union(self, bitmaps: dict, keys: Iterable) -> int:
+        bits = 0
+        for key in keys:
+            bits |= self._get_int(bitmaps, key)
+        return bits
+
+    def _get_int(self, bitmaps: dict, key) -> int:
+        bitmap = bitmaps.get(key)
+        return bitmap.to_int() if bitmap else 0
+
+    def _get_bitmap(self, bitmaps: dict, key) -> _Bitmap:
+        bitmap = bitmaps.get(key)
+        if bitmap is None:
+            bitmap = bitmaps[key] = _Bitmap()
+        return bitmap
+
+    def _discard(self, doc: int):
+        for bitmaps in (self._tags, self._types, self._rates):
+            for bitmap in bitmaps.values():
+                bitmap.discard(doc)
+
+
+def _as_tuple(value: Union[object, Iterable]) -> Tuple:
+    if isinstance(value, (DLSite_Type, DLSite_Rate)):
+        return (value,)
+    return tuple(value)
@@ -0,0 +1,325 @@
+import time
+from typing import Tuple, Union
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+import util
+from DLSite_Cache import CacheEntry, DLSite_Cache
+from DLSite_Observer import DLSite_Observer, get_default_observer
+from DLSite_RateLimit import AIMDScheduler, DLSite_RateLimiter
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class _CappedRetry(Retry):
+    """
+    `Retry` waiting at most `max_retry_wait` seconds between attempts, `Retry-After` included.
+    """
+
+    max_retry_wait = 60.0
+
+    def new(self, **kw) -> "_CappedRetry":
+        retry = super().new(**kw)
+        retry.max_retry_wait = self.max_retry_wait
+        return retry
+
+    def get_backoff_time(self) -> float:
+        return min(super().get_backoff_time(), self.max_retry_wait)
+
+    def get_retry_after(self, response) -> Union[float, None]:
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.max_retry_wait)
+
+
+class DLSite_Transport:
+    """
+    Shared HTTP transport of `DLSite_Product` and `DLSite_Maker`.
+    Keeps a pooled keep-alive `requests.Session` with retry and backoff on 429/5xx,
+    answers from `cache` with ETag/Last-Modified revalidation when one is given,
+    and throttles requests sent to DLsite through `rate_limiter`.
+    Requests and cache lookups are reported to `observer`.
+    Waits between retries, `Retry-After` included, are capped at `max_retry_wait` seconds.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        timeout: Union[float, Tuple[float, float]] = (5.0, 30.0),
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_retry_wait: float = 60.0,
+        headers: dict = {},
+        cache: DLSite_Cache = None,
+        rate_limiter: DLSite_RateLimiter = None,
+        observer: DLSite_Observer = None,
+    ) -> None:
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self._observer = observer
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.max_retry_wait = max_retry_wait
+        # Shared `DLSite_Maker` by id code of `get_maker`, freed with the transport
+        self.makers = {}
+
+        retry = _CappedRetry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            # With a rate limiter `_send_limited` retries, so each attempt takes a token
+            status_forcelist=() if rate_limiter else RETRY_STATUS,
+            allowed_methods=frozenset(["GET", "HEAD", "POST"]),
+            raise_on_status=False,
+        )
+        retry.max_retry_wait = max_retry_wait
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(headers)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict = {},
+        params: dict = {},
+        **kwargs,
+    ) -> requests.Response:
+        if self.cache is None or kwargs.get("stream"):
+            return self._send(method, url, headers, params, **kwargs)
+
+        key = util.get_request_key(method, url, params)
+        entry = self.cache.get(key)
+        if entry and self.cache.is_fresh(entry):
+            self._on_cache(url, "hit")
+            return build_response(entry)
+        headers = _add_validators(headers, entry)
+        resp = self._send(method, url, headers, params, **kwargs)
+        return self._update_cache(key, url, entry, resp)
+
+    async def async_request(
+        self,
+        session: aiohttp.ClientSession,
+        method: str,
+        url: str,
+        headers: dict = {},
+        params: dict = {},
+    ) -> requests.Response:
+        """
+        `request` sent with aiohttp `session`, sharing `cache`, `rate_limiter` and `observer`.
+        Failed requests are not retried.
+        """
+        if self.cache is None:
+            return await self._async_send(session, method, url, headers, params)
+
+        key = util.get_request_key(method, url, params)
+        entry = self.cache.get(key)
+        if entry and self.cache.is_fresh(entry):
+            self._on_cache(url, "hit")
+            return build_response(entry)
+        headers = _add_validators(headers, entry)
+        resp = await self._async_send(session, method, url, headers, params)
+        return self._update_cache(key, url, entry, resp)
+
+    def _update_cache(
+        self, key: str, url: str, entry: Union[CacheEntry, None], resp: requests.Response
+    ) -> requests.Response:
+        if entry and resp.status_code == 304:
+            self.cache.touch(key)
+            self._on_cache(url, "revalidated")
+            return build_response(entry)
+        self._on_cache(url, "miss")
+        if resp.ok and resp.content:
+            self.cache.set(
+                key,
+                url,
+                resp.status_code,
+                resp.content,
+                content_type=resp.headers.get("Content-Type", ""),
+                etag=resp.headers.get("ETag", ""),
+                last_modified=resp.headers.get("Last-Modified", ""),
+            )
+        return resp
+
+    def _on_cache(self, url: str, result: str):
+        observer = self.observer
+        if observer.enabled:
+            observer.on_cache(util.get_url_class(url), result)
+
+    @property
+    def observer(self) -> DLSite_Observer:
+        return self._observer if self._observer else get_default_observer()
+
+    @observer.setter
+    def observer(self, observer: DLSite_Observer):
+        self._observer = observer
+
+    def _send(
+        self, method: str, url: str, headers: dict, params: dict, **kwargs
+    ) -> requests.Response:
+        observer = self.observer
+        if not observer.enabled:
+            return self._send_limited(method, url, headers, params, **kwargs)
+
+        status = None
+        nbytes = 0
+        start = time.perf_counter()
+        try:
+            resp = self._send_limited(method, url, headers, params, **kwargs)
+            status = resp.status_code
+            nbytes = int(resp.headers.get("Content-Length", 0) or 0)
+            if not kwargs.get("stream"):
+                nbytes = len(resp.content)
+            return resp
+        finally:
+            latency = time.perf_counter() - start
+            observer.on_request(util.get_url_class(url), method, status, nbytes, latency)
+
+    def _send_limited(
+        self, method: str, url: str, headers: dict, params: dict, **kwargs
+    ) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        if self.rate_limiter is None:
+            return self.session.request(
+                method, url, headers=headers, params=params, **kwargs
+            )
+
+        attempt = 0
+        while True:
+            with self.rate_limiter.slot(url):
+                status = None
+                start = time.perf_counter()
+                try:
+                    resp = self.session.request(
+                        method, url, headers=headers, params=params, **kwargs
+                    )
+                    status = resp.status_code
+                finally:
+                    self.rate_limiter.record(status, time.perf_counter() - start)
+            if status not in RETRY_STATUS or attempt >= self.retries:
+                return resp
+            resp.close()
+            time.sleep(self._get_retry_wait(resp, attempt))
+            attempt += 1
+
+    async def _async_send(
+        self,
+        session: aiohttp.ClientSession,
+        method: str,
+        url: str,
+        headers: dict,
+        params: dict,
+    ) -> requests.Response:
+        params = {k: str(v) for k, v in params.items()}
+        if self.rate_limiter is not None:
+            await self.rate_limiter.async_acquire(url)
+        status = None
+        content = b""
+        start = time.perf_counter()
+        try:
+            async with session.request(
+                method, url, headers=headers, params=params
+            ) as resp:
+                status = resp.status
+                content = await resp.read()
+                entry = CacheEntry(
+                    url=str(resp.url),
+                    status=status,
+                    content_type=resp.headers.get("Content-Type", ""),
+                    etag=resp.headers.get("ETag", ""),
+                    last_modified=resp.headers.get("Last-Modified", ""),
+                    fetched_at=time.time(),
+                    content=content,
+                )
+        finally:
+            latency = time.perf_counter() - start
+            if self.rate_limiter is not None:
+                self.rate_limiter.record(status, latency)
+            observer = self.observer
+            if observer.enabled:
+                url_class = util.get_url_class(url)
+                observer.on_request(url_class, method, status, len(content), latency)
+        return build_response(entry)
+
+    def _get_retry_wait(self, resp: requests.Response, attempt: int) -> float:
+        retry_after = resp.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            wait = float(retry_after)
+        else:
+            wait = self.backoff_factor * (2**attempt)
+        return min(wait, self.max_retry_wait)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self) -> "DLSite_Transport":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def build_response(entry: CacheEntry) -> requests.Response:
+    """
+    Return `requests.Response` holding a stored response `entry`.
+    """
+    resp = requests.Response()
+    resp.url = entry.url
+    resp.status_code = entry.status
+    resp.headers = CaseInsensitiveDict()
+    for name, value in (
+        ("Content-Type", entry.content_type),
+        ("ETag", entry.etag),
+        ("Last-Modified", entry.last_modified),
+    ):
+        if value:
+            resp.headers[name] = value
+    resp._content = entry.content
+    resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+    return resp
+
+
+def _add_validators(headers: dict, entry: Union[CacheEntry, None]) -> dict:
+    """
+    Return `headers` with ETag/Last-Modified of a stale `entry` to revalidate it.
+    """
+    headers = dict(headers)
+    if entry and entry.etag:
+        headers["If-None-Match"] = entry.etag
+    if entry and entry.last_modified:
+        headers["If-Modified-Since"] = entry.last_modified
+    return headers
+
+
+_default_transport = None
+
+
+def get_default_transport() -> DLSite_Transport:
+    """
+    Return process-wide default `DLSite_Transport`, create it on first use.
+    It is rate limited by `DLSite_RateLimit.DEFAULT_BUDGETS` scaled by an `AIMDScheduler`,
+    use `set_default_transport(DLSite_Transport())` for unthrottled requests.
+    """
+    global _default_transport
+    if _default_transport is None:
+        rate_limiter = DLSite_RateLimiter(scheduler=AIMDScheduler())
+        _default_transport = DLSite_Transport(rate_limiter=rate_limiter)
+    return _default_transport
+
+
+def set_default_transport(transport: DLSite_Transport):
+    """
+    Replace process-wide default `DLSite_Transport` used by products and makers created without one.
+    """
+    global _default_transport
+    _default_transport = transport
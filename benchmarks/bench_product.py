@@ -0,0 +1,141 @@
+"""
+Replay fixture work pages and ajax json through `DLSite_Product` and report
+latency, traced allocations and peak RSS of parsing and every `extract_*` method.
+
+    python benchmarks/bench_product.py [--size small typical huge] [--fixtures DIR NAME ...]
+"""
+import argparse
+import os
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import util  # noqa: E402
+from DLSite_Cache import CacheEntry  # noqa: E402
+from DLSite_Product import ALL_FIELDS, DLSite_Product  # noqa: E402
+from DLSite_Transport import DLSite_Transport, build_response  # noqa: E402
+from fixtures import SIZES, load_fixture, make_fixture  # noqa: E402
+
+EXTRACTORS = (
+    "name",
+    "maker",
+    "date",
+    "size",
+    "type",
+    "rate",
+    "tags",
+    "img_links",
+    "rank",
+    "info",
+    "update_logs",
+)
+
+
+class ReplayTransport(DLSite_Transport):
+    """
+    Answer work page, info ajax and revision ajax requests from a fixture, without network.
+    """
+
+    def __init__(self, page: bytes, product_rest: bytes, revisions: Dict[int, bytes]):
+        super().__init__(pool_size=1, retries=0)
+        self.page = page
+        self.product_rest = product_rest
+        self.revisions = revisions
+
+    def request(self, method, url, headers={}, params={}, **kwargs):
+        url_class = util.get_url_class(url)
+        if url_class == "work":
+            content = self.page
+        elif url_class == "info":
+            content = self.product_rest
+        elif url_class == "revision":
+            content = self.revisions[int(params["page"])]
+        else:
+            raise ValueError(f"No fixture for {url}")
+        return build_response(CacheEntry(url, 200, "", "", "", 0.0, content))
+
+
+def measure(func: Callable[[], object], repeat: int) -> Tuple[float, float, int]:
+    """
+    Return median and min latency in ms and traced peak allocation in bytes of `func`.
+    """
+    func()  # Warm up
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), min(times), peak
+
+
+def bench_fixture(transport: ReplayTransport, repeat: int) -> List[Tuple[str, float, float, int]]:
+    results = []
+
+    product = DLSite_Product("RJ123456", lazy=True, transport=transport)
+    partial = DLSite_Product("RJ123456", lazy=True, transport=transport, partial_parse=True)
+    results.append(("get_soup", *measure(lambda: product.get_soup(update=True), repeat)))
+    results.append(
+        ("get_soup partial", *measure(lambda: partial.get_soup(update=True), repeat))
+    )
+
+    product.get_soup(update=True)
+    product.get_product_rest(update=True)
+    for name in EXTRACTORS:
+        extract = getattr(product, f"extract_{name}")
+
+        def _extract():
+            product._work_outline = None
+            return extract()
+
+        results.append((f"extract_{name}", *measure(_extract, repeat)))
+
+    def _update():
+        DLSite_Product("RJ123456", transport=transport, fields=ALL_FIELDS)
+
+    results.append(("update all fields", *measure(_update, repeat)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", nargs="*", default=list(SIZES), choices=list(SIZES))
+    parser.add_argument(
+        "--fixtures",
+        nargs="+",
+        metavar=("DIR", "NAME"),
+        help="Replay recorded fixtures NAME... from DIR instead of generated ones",
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.fixtures:
+        directory, *names = args.fixtures
+        fixtures = [(name, load_fixture(directory, name)) for name in names]
+    else:
+        fixtures = [(size, make_fixture(size)) for size in args.size]
+
+    for name, (page, product_rest, revisions) in fixtures:
+        transport = ReplayTransport(page, product_rest, revisions)
+        print(f"== {name}: page {len(page) / 1024:.1f} KiB, {len(revisions)} revision pages")
+        print(f"{'benchmark':<24}{'median ms':>12}{'min ms':>12}{'peak KiB':>12}")
+        for bench, median, minimum, peak in bench_fixture(transport, args.repeat):
+            print(f"{bench:<24}{median:>12.3f}{minimum:>12.3f}{peak / 1024:>12.1f}")
+        print()
+
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    max_rss = max_rss / 1024 if sys.platform == "darwin" else max_rss
+    print(f"peak RSS {max_rss / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
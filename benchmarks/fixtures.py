@@ -0,0 +1,156 @@
+import json
+import os
+import re
+from typing import Dict, List, Tuple
+
+# Number of (tags, update logs on work page, revision ajax pages, gallery images)
+SIZES = {
+    "small": (3, 1, 0, 2),
+    "typical": (10, 5, 2, 8),
+    "huge": (60, 10, 30, 120),
+}
+
+
+def make_work_page(
+    id_code: str, n_tags: int, n_logs: int, has_more_logs: bool, n_imgs: int
+) -> bytes:
+    """
+    Return work page shaped like DLsite one, with header, recommendation and footer noise.
+    """
+    tags = "".join(
+        f'<a href="https://www.dlsite.com/maniax/fsr/=/genre/{100 + i:03d}/from/work.genre">'
+        f"ジャンル{i}</a>"
+        for i in range(n_tags)
+    )
+    logs = "".join(
+        f"<li><dl><dt>2021年{1 + i % 12:02d}月{1 + i % 28:02d}日</dt>"
+        f"<dd><span>不具合修正</span><span>機能追加</span></dd><dd>更新内容 {i}</dd></dl></li>"
+        for i in range(n_logs)
+    )
+    imgs = "".join(
+        f'<div data-src="//img.dlsite.jp/modpub/images2/work/doujin/{id_code}_img_smp{i}.jpg">'
+        "</div>"
+        for i in range(n_imgs)
+    )
+    more = '<div class="version_up_more"><a>もっと見る</a></div>' if has_more_logs else ""
+    noise = "".join(
+        f'<li class="recommend_item"><a href="https://www.dlsite.com/maniax/work/=/product_id/'
+        f'RJ{200000 + i}.html"><img src="//img.dlsite.jp/x{i}.jpg" alt="おすすめ {i}"></a>'
+        f"<span>おすすめ作品 {i}</span></li>"
+        for i in range(300)
+    )
+    return f"""<!DOCTYPE html><html lang="ja"><head><meta charset="utf-8">
+<title>{id_code}</title></head><body>
+<div id="header"><ul>{noise[: len(noise) // 3]}</ul></div>
+<div id="top_wrapper">
+<h1 id="work_name">作品名 {id_code}</h1>
+<table id="work_maker"><tr><th>サークル名</th><td><span class="maker_name">
+<a href="https://www.dlsite.com/maniax/circle/profile/=/maker_id/RG12345.html">サークル</a>
+</span></td></tr></table>
+<div class="product-slider-data">{imgs}</div>
+<table id="work_outline">
+<tr><th>販売日</th><td><a href="https://www.dlsite.com/maniax/new">2021年03月04日</a></td></tr>
+<tr><th>シリーズ名</th><td><a href="https://www.dlsite.com/maniax/fsr/=/title_id/SRI1">シリーズ</a></td></tr>
+<tr><th>作者</th><td><a href="https://a">作者A</a> / <a href="https://b">作者B</a></td></tr>
+<tr><th>年齢指定</th><td><div class="work_genre"><span class="icon_ADL">18禁</span></div></td></tr>
+<tr><th>作品形式</th><td><div class="work_genre"><span class="icon_SOU">ボイス</span></div></td></tr>
+<tr><th>ファイル容量</th><td><div class="main_genre">総計 1.5GB</div></td></tr>
+<tr><th>ジャンル</th><td><div class="main_genre">{tags}</div></td></tr>
+</table>
+<div class="work_article version_up"><ul>{logs}</ul>{more}</div>
+</div>
+<div class="recommend"><ul>{noise}</ul></div>
+<div id="footer"><ul>{noise[: len(noise) // 3]}</ul></div>
+</body></html>""".encode("utf-8")
+
+
+def make_product_rest(id_code: str) -> bytes:
+    return json.dumps(
+        {
+            id_code: {
+                "price": 1320,
+                "price_without_tax": 1200,
+                "official_price": 1320,
+                "on_sale": 1,
+                "dl_count": "12345",
+                "wishlist_count": 678,
+                "rate_average_2dp": 4.62,
+                "rate_count_detail": [
+                    {"review_point": p, "count": 10 * p} for p in range(1, 6)
+                ],
+                "rank": [
+                    {"term": t, "category": "voice", "rank": 3, "rank_date": "2021-03-10"}
+                    for t in ("day", "week", "month", "year", "total")
+                ],
+            }
+        }
+    ).encode("utf-8")
+
+
+def make_revision_page(page: int, n_pages: int, per_page: int = 10) -> bytes:
+    return json.dumps(
+        {
+            "list": [
+                {
+                    "release_date": f"2020年{1 + i % 12:02d}月{1 + page % 28:02d}日",
+                    "content_update_type": ["不具合修正"],
+                    "info": f"更新内容 {page}-{i}",
+                }
+                for i in range(per_page)
+            ],
+            "more": page < n_pages + 1,
+        }
+    ).encode("utf-8")
+
+
+def make_search_page(id_codes: List[str]) -> bytes:
+    """
+    Return maker works search result page listing `id_codes`, with ranking and recommendation noise.
+    """
+    works = "".join(
+        f'<li class="search_result_img_box_inner"><div class="work_thumb">'
+        f'<a href="https://www.dlsite.com/maniax/work/=/product_id/{id_code}.html">'
+        f'<img src="//img.dlsite.jp/{id_code}.jpg"></a></div><dl><dd class="work_name">'
+        f'<a href="https://www.dlsite.com/maniax/work/=/product_id/{id_code}.html">'
+        f"作品名 {id_code}</a></dd></dl></li>"
+        for id_code in id_codes
+    )
+    noise = "".join(
+        f'<li><a href="https://www.dlsite.com/maniax/work/=/product_id/RJ{300000 + i}.html">'
+        f"ランキング {i}</a></li>"
+        for i in range(20)
+    )
+    return f"""<!DOCTYPE html><html lang="ja"><head><meta charset="utf-8"></head><body>
+<div class="ranking"><ul>{noise}</ul></div>
+<ul id="search_result_list" class="n_worklist">{works}</ul>
+<div class="recommend"><ul>{noise}</ul></div>
+</body></html>""".encode("utf-8")
+
+
+def make_fixture(size: str, id_code: str = "RJ123456") -> Tuple[bytes, bytes, Dict[int, bytes]]:
+    """
+    Return work page, info ajax json and revision ajax json by page of fixture `size`.
+    """
+    n_tags, n_logs, n_pages, n_imgs = SIZES[size]
+    page = make_work_page(id_code, n_tags, n_logs, n_pages > 0, n_imgs)
+    revisions = {p: make_revision_page(p, n_pages) for p in range(2, n_pages + 2)}
+    return page, make_product_rest(id_code), revisions
+
+
+def load_fixture(directory: str, name: str) -> Tuple[bytes, bytes, Dict[int, bytes]]:
+    """
+    Return recorded fixture `name` from `directory`, stored as `<name>.html`,
+    `<name>.info.json` and `<name>.revision.<page>.json`.
+    """
+    path = os.path.join(directory, name)
+    with open(f"{path}.html", "rb") as f:
+        page = f.read()
+    with open(f"{path}.info.json", "rb") as f:
+        product_rest = f.read()
+    revisions = {}
+    for file_name in os.listdir(directory):
+        match = re.fullmatch(re.escape(name) + r"\.revision\.(\d+)\.json", file_name)
+        if match:
+            with open(os.path.join(directory, file_name), "rb") as f:
+                revisions[int(match.group(1))] = f.read()
+    return page, product_rest, revisions
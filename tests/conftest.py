@@ -0,0 +1,96 @@
+import http.server
+import os
+import sys
+import threading
+from typing import Callable, Dict, List, NamedTuple, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StubRequest(NamedTuple):
+    method: str
+    path: str
+    query: Dict[str, str]
+    headers: Dict[str, str]
+
+
+# Route handler returns `(status, headers, body)` of a request
+Handler = Callable[[StubRequest], Tuple[int, Dict[str, str], bytes]]
+
+
+class StubServer:
+    """
+    Local HTTP server answering from `routes` by path, logging every request.
+    """
+
+    def __init__(self) -> None:
+        self.routes: Dict[str, Handler] = {}
+        self.requests: List[StubRequest] = []
+        stub = self
+
+        class RequestHandler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self._respond("GET")
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                self._respond("POST")
+
+            def _respond(self, method: str):
+                parts = urlsplit(self.path)
+                query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+                request = StubRequest(method, parts.path, query, dict(self.headers))
+                stub.requests.append(request)
+                handler = stub.routes.get(parts.path)
+                status, headers, body = (
+                    handler(request) if handler else (404, {}, b"Not Found")
+                )
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), RequestHandler)
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_port}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def get_requests(self, path: str) -> List[StubRequest]:
+        return [r for r in self.requests if r.path == path]
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def stub_server() -> StubServer:
+    server = StubServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def dlsite_stub(stub_server: StubServer, monkeypatch) -> StubServer:
+    """
+    Stub server standing in for `https://www.dlsite.com`.
+    """
+    import DLSite_Maker
+    import DLSite_Product
+
+    monkeypatch.setattr(DLSite_Product, "BASE_URL", stub_server.base_url)
+    monkeypatch.setattr(DLSite_Maker, "BASE_URL", stub_server.base_url)
+    DLSite_Maker.clear_makers()
+    yield stub_server
+    DLSite_Maker.clear_makers()
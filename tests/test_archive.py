@@ -0,0 +1,94 @@
+import asyncio
+import os
+
+from benchmarks.fixtures import make_fixture
+from DLSite_Archive import (
+    INDEX_NAME,
+    DLSite_ArchiveReader,
+    DLSite_ArchiveWriter,
+    DLSite_RecordingTransport,
+    DLSite_ReplayTransport,
+)
+from DLSite_AsyncProduct import fetch_many
+from DLSite_Cache import DLSite_Cache
+from DLSite_Product import ALL_FIELDS, DLSite_Product
+
+HTML = {"Content-Type": "text/html; charset=utf-8"}
+JSON = {"Content-Type": "application/json"}
+FIELDS = [f for f in ALL_FIELDS if f != "update_logs"]
+
+
+def _serve_product(stub, id_code: str) -> dict:
+    page, product_rest, revisions = make_fixture("typical", id_code)
+    stub.routes[f"/maniax/work/=/product_id/{id_code}"] = lambda request: (200, HTML, page)
+    stub.routes["/maniax/product/info/ajax"] = lambda request: (200, JSON, product_rest)
+    stub.routes["/maniax/product/revision/ajax"] = lambda request: (
+        200,
+        JSON,
+        revisions[int(request.query["page"])],
+    )
+    return {"page": page, "product_rest": product_rest, "revisions": revisions}
+
+
+def _fetch(transport) -> DLSite_Product:
+    product = DLSite_Product("RJ100001", transport=transport, fields=FIELDS)
+    # Revision pages one at a time, none requested past the last one
+    product._update_logs = list(product.iter_update_logs(prefetch=1))
+    return product
+
+
+def _count_records(directory: str) -> int:
+    with open(os.path.join(directory, INDEX_NAME), encoding="utf-8") as f:
+        return sum(1 for line in f if line.strip())
+
+
+def test_record_then_replay_is_byte_identical(dlsite_stub, tmp_path):
+    directory = str(tmp_path / "archive")
+    served = _serve_product(dlsite_stub, "RJ100001")
+    work_url = f"{dlsite_stub.base_url}/maniax/work/=/product_id/RJ100001"
+
+    cache = DLSite_Cache(str(tmp_path / "cache.sqlite"))
+    with DLSite_ArchiveWriter(directory) as writer:
+        transport = DLSite_RecordingTransport(writer, retries=0, cache=cache)
+        recorded = _fetch(transport)
+        writer.flush()
+        # Work page, info ajax and revision pages 2 and 3
+        assert _count_records(directory) == 4
+        # Answered from cache, sync or async, nothing is appended again
+        _fetch(transport)
+        asyncio.run(fetch_many(["RJ100001"], transport=transport))
+        writer.flush()
+        assert _count_records(directory) == 4
+    n_requests = len(dlsite_stub.requests)
+
+    with DLSite_ArchiveReader(directory) as reader:
+        transport = DLSite_ReplayTransport(reader, retries=0)
+        assert transport.request("GET", work_url).content == served["page"]
+        for page, content in served["revisions"].items():
+            url, params = recorded._get_update_logs_request(page)
+            assert transport.request("POST", url, params=params).content == content
+        replayed = _fetch(transport)
+        (fetched,) = asyncio.run(fetch_many(["RJ100001"], transport=transport))
+
+        assert replayed.info == recorded.info
+        assert replayed.update_logs == recorded.update_logs
+        assert fetched.update_logs == recorded.update_logs
+    assert len(dlsite_stub.requests) == n_requests
+
+
+def test_async_requests_are_recorded(dlsite_stub, tmp_path):
+    directory = str(tmp_path / "archive")
+    served = _serve_product(dlsite_stub, "RJ100001")
+
+    with DLSite_ArchiveWriter(directory) as writer:
+        transport = DLSite_RecordingTransport(writer, retries=0)
+        asyncio.run(fetch_many(["RJ100001"], transport=transport))
+
+    with DLSite_ArchiveReader(directory) as reader:
+        transport = DLSite_ReplayTransport(reader, retries=0)
+        url, params = DLSite_Product(
+            "RJ100001", lazy=True, transport=transport
+        )._get_product_rest_request()
+        resp = transport.request("GET", url, params=params)
+        assert resp.content == served["product_rest"]
+        assert len(reader) == 4
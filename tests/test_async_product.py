@@ -0,0 +1,99 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from benchmarks.fixtures import make_fixture, make_product_rest
+from DLSite_AsyncProduct import DLSite_AsyncProduct, fetch_many
+from DLSite_Product import ALL_FIELDS
+from DLSite_Transport import DLSite_Transport
+
+HTML = {"Content-Type": "text/html; charset=utf-8"}
+JSON = {"Content-Type": "application/json"}
+
+
+def _serve_product(stub, id_code: str, size: str = "typical"):
+    page, _, revisions = make_fixture(size, id_code)
+    stub.routes[f"/maniax/work/=/product_id/{id_code}"] = lambda request: (200, HTML, page)
+    stub.routes["/maniax/product/info/ajax"] = lambda request: (
+        200,
+        JSON,
+        make_product_rest(request.query["product_id"]),
+    )
+    stub.routes["/maniax/product/revision/ajax"] = lambda request: (
+        200,
+        JSON,
+        revisions[int(request.query["page"])],
+    )
+
+
+class NoSyncTransport(DLSite_Transport):
+    def request(self, method, url, headers={}, params={}, **kwargs):
+        raise AssertionError(f"sync request from async_update: {method} {url}")
+
+
+async def _async_update(product: DLSite_AsyncProduct, **kwargs):
+    async with aiohttp.ClientSession() as session:
+        await product.async_update(session, **kwargs)
+
+
+@pytest.mark.parametrize(
+    "product_fields, update_fields",
+    [
+        (["update_logs"], None),
+        (ALL_FIELDS, ["update_logs"]),
+        (ALL_FIELDS, None),
+        (ALL_FIELDS, []),
+    ],
+)
+def test_async_update_never_uses_sync_transport(dlsite_stub, product_fields, update_fields):
+    _serve_product(dlsite_stub, "RJ100001")
+    product = DLSite_AsyncProduct(
+        "RJ100001", transport=NoSyncTransport(retries=0), fields=product_fields
+    )
+
+    asyncio.run(_async_update(product, fields=update_fields))
+
+    revision_pages = [
+        r.query["page"] for r in dlsite_stub.get_requests("/maniax/product/revision/ajax")
+    ]
+    if update_fields == []:
+        assert dlsite_stub.requests == []
+    else:
+        # Pages 2 and 3 of the typical fixture, each fetched once
+        assert sorted(revision_pages) == ["2", "3"]
+        assert len(product.update_logs) == 25
+
+
+def test_fetch_many_keeps_going_after_404(dlsite_stub):
+    _serve_product(dlsite_stub, "RJ100001")
+    _serve_product(dlsite_stub, "RJ100003")
+
+    results = asyncio.run(
+        fetch_many(["RJ100001", "RJ100002", "RJ100003"], fields=("name",))
+    )
+
+    assert isinstance(results[0], DLSite_AsyncProduct)
+    assert results[0].name == "作品名 RJ100001"
+    assert isinstance(results[1], ValueError)
+    assert isinstance(results[2], DLSite_AsyncProduct)
+
+
+@pytest.mark.parametrize("speculative_revision", [False, True])
+def test_revision_page_is_speculative_only_on_request(dlsite_stub, speculative_revision):
+    ids = [f"RJ10000{n}" for n in range(1, 4)]
+    for id_code in ids:
+        # Small fixture has no more update logs than the work page shows
+        _serve_product(dlsite_stub, id_code, size="small")
+    dlsite_stub.routes["/maniax/product/revision/ajax"] = lambda request: (
+        200,
+        JSON,
+        b'{"list": [], "more": false}',
+    )
+
+    results = asyncio.run(fetch_many(ids, speculative_revision=speculative_revision))
+
+    assert all(isinstance(r, DLSite_AsyncProduct) for r in results)
+    assert all(len(r.update_logs) == 1 for r in results)
+    revision_requests = dlsite_stub.get_requests("/maniax/product/revision/ajax")
+    assert len(revision_requests) == (len(ids) if speculative_revision else 0)
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from DLSite_Product import DLSite_Product
+from DLSite_Transport import DLSite_Transport
+
+INFO_PATH = "/maniax/product/info/ajax"
+
+
+def _info_route(missing=()):
+    def handler(request):
+        ids = request.query["product_id"].split(",")
+        body = {i: {"price": 110, "dl_count": "1"} for i in ids if i not in missing}
+        return 200, {"Content-Type": "application/json"}, json.dumps(body).encode()
+
+    return handler
+
+
+def test_one_request_per_chunk(dlsite_stub):
+    dlsite_stub.routes[INFO_PATH] = _info_route()
+    ids = [f"RJ{n:06d}" for n in range(100001, 100006)]
+
+    products = DLSite_Product.fetch_rest_many(
+        ids, chunk_size=2, transport=DLSite_Transport(retries=0)
+    )
+
+    requests = dlsite_stub.get_requests(INFO_PATH)
+    assert [r.query["product_id"] for r in requests] == [
+        "RJ100001,RJ100002",
+        "RJ100003,RJ100004",
+        "RJ100005",
+    ]
+    assert [p.id for p in products] == ids
+    assert all(p._product_rest["price"] == 110 for p in products)
+
+
+def test_missing_products_are_left_unfilled(dlsite_stub):
+    dlsite_stub.routes[INFO_PATH] = _info_route(missing={"RJ100002"})
+
+    products = DLSite_Product.fetch_rest_many(
+        ["RJ100001", "RJ100002"], transport=DLSite_Transport(retries=0)
+    )
+
+    assert products[0]._product_rest["price"] == 110
+    assert products[1]._product_rest == {}
+    assert len(dlsite_stub.get_requests(INFO_PATH)) == 1
+
+
+def test_invalid_id_is_rejected(dlsite_stub):
+    dlsite_stub.routes[INFO_PATH] = _info_route()
+
+    with pytest.raises(ValueError):
+        DLSite_Product.fetch_rest_many(
+            ["RJ123456", "not-an-id"], transport=DLSite_Transport(retries=0)
+        )
+    assert dlsite_stub.requests == []
+
+
+def test_empty_list_answer_leaves_products_unfilled(dlsite_stub):
+    dlsite_stub.routes[INFO_PATH] = lambda request: (200, {}, b"[]")
+
+    products = DLSite_Product.fetch_rest_many(
+        ["RJ100001", "RJ100002"], transport=DLSite_Transport(retries=0)
+    )
+
+    assert [p._product_rest for p in products] == [{}, {}]
@@ -0,0 +1,117 @@
+import hashlib
+import os
+import re
+
+import pytest
+
+from DLSite_Image import DLSite_ImageDownloader
+from DLSite_Transport import DLSite_Transport
+
+IMAGE = bytes(range(256)) * 1000
+
+
+def _image_route(body: bytes):
+    def handler(request):
+        match = re.fullmatch(r"bytes=(\d+)-", request.headers.get("Range", ""))
+        if not match:
+            return 200, {"Content-Type": "image/jpeg"}, body
+        start = int(match.group(1))
+        if start >= len(body):
+            return 416, {"Content-Range": f"bytes */{len(body)}"}, b""
+        headers = {"Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}"}
+        return 206, headers, body[start:]
+
+    return handler
+
+
+@pytest.fixture
+def downloader(tmp_path):
+    downloader = DLSite_ImageDownloader(
+        str(tmp_path),
+        transport=DLSite_Transport(retries=0),
+        max_workers=2,
+        chunk_size=4096,
+    )
+    yield downloader
+    downloader.close()
+
+
+def _part_path(downloader: DLSite_ImageDownloader, url: str) -> str:
+    name = hashlib.sha1(url.encode("utf-8")).hexdigest() + ".part"
+    return os.path.join(downloader.directory, "partial", name)
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_fresh_download(stub_server, downloader):
+    stub_server.routes["/a.jpg"] = _image_route(IMAGE)
+    url = stub_server.base_url + "/a.jpg"
+
+    result = downloader.download(url, "RJ100001")
+
+    assert result.status == "downloaded"
+    assert result.sha256 == hashlib.sha256(IMAGE).hexdigest()
+    assert result.size == len(IMAGE)
+    assert result.path.endswith(result.sha256 + ".jpg")
+    assert _read(result.path) == IMAGE
+    assert not os.listdir(os.path.join(downloader.directory, "partial"))
+    assert downloader.stats.bytes == len(IMAGE)
+
+
+def test_resume_from_part(stub_server, downloader):
+    stub_server.routes["/a.jpg"] = _image_route(IMAGE)
+    url = stub_server.base_url + "/a.jpg"
+    with open(_part_path(downloader, url), "wb") as f:
+        f.write(IMAGE[:1000])
+
+    result = downloader.download(url)
+
+    assert stub_server.requests[0].headers["Range"] == "bytes=1000-"
+    assert result.sha256 == hashlib.sha256(IMAGE).hexdigest()
+    assert _read(result.path) == IMAGE
+    assert downloader.stats.bytes == len(IMAGE) - 1000
+
+
+def test_complete_part_on_416(stub_server, downloader):
+    stub_server.routes["/a.jpg"] = _image_route(IMAGE)
+    url = stub_server.base_url + "/a.jpg"
+    with open(_part_path(downloader, url), "wb") as f:
+        f.write(IMAGE)
+
+    result = downloader.download(url)
+
+    assert len(stub_server.requests) == 1
+    assert result.status == "downloaded"
+    assert result.size == len(IMAGE)
+    assert _read(result.path) == IMAGE
+
+
+def test_url_dedup_across_calls(stub_server, downloader):
+    stub_server.routes["/a.jpg"] = _image_route(IMAGE)
+    url = stub_server.base_url + "/a.jpg"
+
+    first = downloader.download(url, "RJ100001")
+    second = downloader.download(url, "RJ100002")
+    repeated = list(downloader.download_many([(url, "RJ100003"), (url, "RJ100004")]))
+
+    assert len(stub_server.requests) == 1
+    assert second.status == "url_dedup"
+    assert second.path == first.path
+    assert second.product_id == "RJ100002"
+    assert [r.status for r in repeated] == ["url_dedup", "url_dedup"]
+
+
+def test_hash_dedup_across_urls(stub_server, downloader):
+    stub_server.routes["/a.jpg"] = _image_route(IMAGE)
+    stub_server.routes["/b.jpg"] = _image_route(IMAGE)
+
+    first = downloader.download(stub_server.base_url + "/a.jpg")
+    second = downloader.download(stub_server.base_url + "/b.jpg")
+
+    assert first.status == "downloaded"
+    assert second.status == "hash_dedup"
+    assert second.path == first.path
+    assert len(os.listdir(os.path.dirname(first.path))) == 1
@@ -0,0 +1,88 @@
+import gc
+import json
+import weakref
+
+import pytest
+
+from benchmarks.fixtures import make_fixture, make_product_rest, make_search_page
+from DLSite_Maker import get_maker
+from DLSite_Product import DLSite_Product
+from DLSite_Transport import DLSite_Transport
+
+INFO_PATH = "/maniax/product/info/ajax"
+WORKS_PATH = "/maniax/fsr/=/maker_id/RG12345/per_page/{per_page}/page/{page}"
+
+
+def test_makers_are_shared_per_transport(dlsite_stub):
+    transport_a = DLSite_Transport(retries=0)
+    transport_b = DLSite_Transport(retries=0)
+
+    maker_a = get_maker("RG12345", transport=transport_a)
+
+    assert get_maker("RG12345", transport=transport_a) is maker_a
+    maker_b = get_maker("RG12345", transport=transport_b)
+    assert maker_b is not maker_a
+    assert maker_b.transport is transport_b
+
+
+def test_product_maker_uses_product_transport(dlsite_stub):
+    page, _, _ = make_fixture("small", "RJ100001")
+    dlsite_stub.routes["/maniax/work/=/product_id/RJ100001"] = lambda request: (200, {}, page)
+    other = get_maker("RG12345", transport=DLSite_Transport(retries=0))
+
+    transport = DLSite_Transport(retries=0)
+    product = DLSite_Product("RJ100001", transport=transport, fields=("maker",))
+
+    assert product.maker.id == "RG12345"
+    assert product.maker is not other
+    assert product.maker.transport is transport
+
+
+def test_makers_are_freed_with_their_transport(dlsite_stub):
+    transport = DLSite_Transport(retries=0)
+    maker = weakref.ref(get_maker("RG12345", transport=transport))
+    transport = weakref.ref(transport)
+
+    gc.collect()
+
+    assert transport() is None
+    assert maker() is None
+
+
+def _serve_works(stub, id_codes, per_page: int):
+    for page in range(1, len(id_codes) // per_page + 2):
+        ids = id_codes[(page - 1) * per_page : page * per_page]
+        stub.routes[WORKS_PATH.format(per_page=per_page, page=page)] = (
+            lambda request, ids=ids: (200, {}, make_search_page(ids))
+        )
+
+
+@pytest.mark.parametrize("n_works", [5, 4])
+def test_iter_work_ids_reads_result_list_only(dlsite_stub, n_works):
+    ids = [f"RJ{100001 + i}" for i in range(n_works)]
+    _serve_works(dlsite_stub, ids, per_page=2)
+    maker = get_maker("RG12345", transport=DLSite_Transport(retries=0))
+
+    assert list(maker.iter_work_ids(per_page=2)) == ids
+    # Last page is short, or empty when the works fill whole pages
+    assert len(dlsite_stub.requests) == 3
+
+
+def test_get_works_leaves_out_works_missing_from_info(dlsite_stub):
+    ids = ["RJ100001", "RJ100002", "RJ100003"]
+    _serve_works(dlsite_stub, ids, per_page=100)
+    product_json = {}
+    for id_code in ("RJ100001", "RJ100003"):
+        product_json.update(json.loads(make_product_rest(id_code)))
+    dlsite_stub.routes[INFO_PATH] = lambda request: (
+        200,
+        {"Content-Type": "application/json"},
+        json.dumps(product_json).encode(),
+    )
+    maker = get_maker("RG12345", transport=DLSite_Transport(retries=0))
+
+    works = maker.get_works(fields=("rank",))
+
+    assert [w.id for w in works] == ["RJ100001", "RJ100003"]
+    assert all(w.rank for w in works)
+    assert len(dlsite_stub.get_requests(INFO_PATH)) == 1
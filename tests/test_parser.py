@@ -0,0 +1,81 @@
+import pytest
+
+from benchmarks.fixtures import SIZES, make_fixture
+from DLSite_Parser import ParseError, parse_many
+from DLSite_Product import ALL_FIELDS, DLSite_Product
+from DLSite_Record import ProductRecord
+from DLSite_Transport import DLSite_Transport
+
+JSON = {"Content-Type": "application/json"}
+
+
+def test_bad_page_does_not_drop_other_records():
+    pages = []
+    for n in range(100001, 100004):
+        id_code = f"RJ{n}"
+        page, product_rest, _ = make_fixture("small", id_code)
+        pages.append((id_code, page, product_rest))
+    maintenance = b"<html><body><p>Maintenance</p></body></html>"
+    pages.insert(1, ("RJ100009", maintenance, None))
+
+    results = list(parse_many(pages, max_workers=2, chunksize=2))
+
+    assert [type(r) for r in results] == [
+        ProductRecord,
+        ParseError,
+        ProductRecord,
+        ProductRecord,
+    ]
+    assert results[1].url == "RJ100009"
+    assert [r.id for r in results if isinstance(r, ProductRecord)] == [
+        "RJ100001",
+        "RJ100002",
+        "RJ100003",
+    ]
+
+
+def _get_fields(product: DLSite_Product) -> dict:
+    fields = {}
+    for field in ALL_FIELDS:
+        if field == "maker":
+            fields[field] = (product.maker.id, product.maker.name)
+        elif field == "type":
+            fields[field] = (product.product_type, product.product_type_keyword)
+        else:
+            fields[field] = getattr(product, field)
+    return fields
+
+
+@pytest.mark.parametrize("size", list(SIZES))
+def test_partial_parse_matches_full_parse(dlsite_stub, size):
+    page, product_rest, revisions = make_fixture(size, "RJ100001")
+    dlsite_stub.routes["/maniax/work/=/product_id/RJ100001"] = lambda request: (
+        200,
+        {"Content-Type": "text/html; charset=utf-8"},
+        page,
+    )
+    dlsite_stub.routes["/maniax/product/info/ajax"] = lambda request: (
+        200,
+        JSON,
+        product_rest,
+    )
+    dlsite_stub.routes["/maniax/product/revision/ajax"] = lambda request: (
+        200,
+        JSON,
+        revisions[int(request.query["page"])],
+    )
+
+    full, partial = (
+        DLSite_Product(
+            "RJ100001",
+            transport=DLSite_Transport(retries=0),
+            fields=ALL_FIELDS,
+            partial_parse=partial_parse,
+        )
+        for partial_parse in (False, True)
+    )
+
+    full_fields = _get_fields(full)
+    assert full_fields["name"] == "作品名 RJ100001"
+    assert len(full_fields["tags"]) == SIZES[size][0]
+    assert _get_fields(partial) == full_fields
@@ -0,0 +1,130 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from benchmarks.fixtures import make_fixture, make_work_page
+from DLSite_Product import DLSite_Product
+from DLSite_Record import ProductRecord
+from DLSite_Transport import DLSite_Transport
+
+HTML = {"Content-Type": "text/html; charset=utf-8"}
+JSON = {"Content-Type": "application/json"}
+WORK_PATH = "/maniax/work/=/product_id/{}"
+INFO_PATH = "/maniax/product/info/ajax"
+
+
+def _make_page(dates) -> bytes:
+    logs = "".join(
+        f"<li><dl><dt>{date}</dt><dd><span>不具合修正</span></dd><dd>更新内容 {i}</dd></dl></li>"
+        for i, date in enumerate(dates)
+    )
+    return (
+        '<html><body><div class="work_article version_up">'
+        f"<ul>{logs}</ul></div></body></html>"
+    ).encode("utf-8")
+
+
+def test_iter_update_logs_keeps_logs_of_since_day():
+    page = _make_page(
+        ["2021年03月04日", "2021年03月04日", "2021年03月03日", "2021年03月01日"]
+    )
+    product = DLSite_Product("RJ100001", lazy=True, transport=DLSite_Transport(retries=0))
+    product.get_soup(content=page)
+
+    update_logs = list(product.iter_update_logs(since=datetime(2021, 3, 3)))
+
+    # Logs of the stored day itself may be new, only older ones are known
+    assert [log["detail"] for log in update_logs] == [
+        "更新内容 0",
+        "更新内容 1",
+        "更新内容 2",
+    ]
+
+
+def _count_calls(product: DLSite_Product, name: str, delay: float = 0.0) -> list:
+    calls = []
+    extract = getattr(product, name)
+
+    def counted(*args, **kwargs):
+        calls.append(name)
+        time.sleep(delay)
+        return extract(*args, **kwargs)
+
+    setattr(product, name, counted)
+    return calls
+
+
+def _serve_product(stub, id_code: str, page: bytes = None):
+    fixture_page, product_rest, _ = make_fixture("small", id_code)
+    page = page if page else fixture_page
+    stub.routes[WORK_PATH.format(id_code)] = lambda request: (200, HTML, page)
+    stub.routes[INFO_PATH] = lambda request: (200, JSON, product_rest)
+
+
+def _stored_product(transport: DLSite_Transport) -> DLSite_Product:
+    record = ProductRecord(
+        id="RJ100001",
+        name="stored name",
+        rank={"rate": 1.0},
+        info={"price": 1},
+    )
+    return DLSite_Product.from_record(record, transport=transport)
+
+
+def test_empty_result_is_computed_once():
+    page = make_work_page("RJ100001", 0, 0, False, 0)
+    product = DLSite_Product("RJ100001", lazy=True, transport=DLSite_Transport(retries=0))
+    product.get_soup(content=page)
+    calls = _count_calls(product, "extract_tags")
+
+    assert product.tags == []
+    assert product.tags == []
+    assert calls == ["extract_tags"]
+
+
+def test_first_parse_keeps_hydrated_fields(dlsite_stub):
+    _serve_product(dlsite_stub, "RJ100001")
+    product = _stored_product(DLSite_Transport(retries=0))
+
+    # Fetched and parsed for the first time, e.g. for a field that was not stored
+    product.get_soup()
+
+    assert len(dlsite_stub.get_requests(WORK_PATH.format("RJ100001"))) == 1
+    assert product.name == "stored name"
+
+
+def test_soup_update_invalidates_html_fields_only(dlsite_stub):
+    _serve_product(dlsite_stub, "RJ100001")
+    product = _stored_product(DLSite_Transport(retries=0))
+
+    product.get_soup(update=True)
+
+    assert product.name == "作品名 RJ100001"
+    assert product.rank == {"rate": 1.0}
+    assert dlsite_stub.get_requests(INFO_PATH) == []
+
+
+def test_product_rest_update_invalidates_rest_fields_only(dlsite_stub):
+    _serve_product(dlsite_stub, "RJ100001")
+    product = _stored_product(DLSite_Transport(retries=0))
+
+    product.get_product_rest(update=True)
+
+    assert product.rank["rate"] == 4.62
+    assert product.name == "stored name"
+    assert dlsite_stub.get_requests(WORK_PATH.format("RJ100001")) == []
+
+
+def test_thread_safe_computes_each_field_once(dlsite_stub):
+    _serve_product(dlsite_stub, "RJ100001")
+    product = DLSite_Product(
+        "RJ100001", lazy=True, transport=DLSite_Transport(retries=0), thread_safe=True
+    )
+    calls = _count_calls(product, "extract_tags", delay=0.05)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: product.tags, range(8)))
+
+    assert calls == ["extract_tags"]
+    assert all(r is results[0] for r in results)
+    assert len(dlsite_stub.get_requests(WORK_PATH.format("RJ100001"))) == 1
@@ -0,0 +1,24 @@
+from DLSite_RateLimit import DEFAULT_BUDGETS, AIMDScheduler, DLSite_RateLimiter
+
+WORK_URL = "https://www.dlsite.com/maniax/work/=/product_id/RJ123456"
+
+
+def test_aimd_scales_bucket_rates():
+    rate_limiter = DLSite_RateLimiter(scheduler=AIMDScheduler(initial=4))
+    bucket = rate_limiter.get_bucket(WORK_URL)
+
+    for _ in range(20):
+        rate_limiter.record(200, 0.1)
+    raised = bucket.rate
+    assert raised > DEFAULT_BUDGETS["work"]
+
+    rate_limiter.record(429, 0.1)
+    assert bucket.rate < raised
+    assert bucket.rate == DEFAULT_BUDGETS["work"] * rate_limiter.scheduler.scale
+
+
+def test_fixed_rates_without_scheduler():
+    rate_limiter = DLSite_RateLimiter()
+    for _ in range(20):
+        rate_limiter.record(200, 0.1)
+    assert rate_limiter.get_bucket(WORK_URL).rate == DEFAULT_BUDGETS["work"]
@@ -0,0 +1,56 @@
+from datetime import datetime
+
+from DLSite_Enum import DLSite_Rate, DLSite_Type
+from DLSite_Product import DLSite_Product
+from DLSite_Record import ProductRecord
+from DLSite_Store import DLSite_Store
+from DLSite_Transport import DLSite_Transport
+
+
+def _record(id_code: str) -> ProductRecord:
+    return ProductRecord(
+        id=id_code,
+        name="name",
+        maker_id="RG12345",
+        maker_name="maker",
+        date=datetime(2021, 3, 10),
+        size=1024,
+        type=DLSite_Type.VOICE,
+        type_keyword="SOU",
+        rate=DLSite_Rate.R18,
+        tags=[{"id": 497, "name": "tag"}],
+        img_links=[],
+        rank=None,
+        info=None,
+    )
+
+
+def test_load_and_delete_are_case_insensitive():
+    store = DLSite_Store(":memory:")
+    store.upsert(_record("RJ123456"))
+
+    assert store.load("rj123456").id == "RJ123456"
+    store.delete("rj123456")
+    assert store.load("RJ123456") is None
+    assert store.query(tag_ids=[497]) == []
+    assert len(store) == 0
+
+
+def test_record_does_not_share_fields_with_product():
+    record = _record("RJ123456")
+    object.__setattr__(record, "rank", {"rate": 4.5, "rank": [{"term": "day", "rank": 1}]})
+    object.__setattr__(record, "info", {"price": 110})
+
+    product = DLSite_Product.from_record(record, transport=DLSite_Transport(retries=0))
+    product.info["price"] = 0
+    product.rank["rank"][0]["rank"] = 2
+    product.tags[0]["name"] = "changed"
+    assert record.info == {"price": 110}
+    assert record.rank["rank"] == [{"term": "day", "rank": 1}]
+    assert record.tags == [{"id": 497, "name": "tag"}]
+
+    copied = product.to_record()
+    product.info["price"] = 220
+    product.tags.append({"id": 1, "name": "new"})
+    assert copied.info == {"price": 0}
+    assert len(copied.tags) == 1
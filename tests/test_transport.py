@@ -0,0 +1,169 @@
+import threading
+import time
+
+import pytest
+
+import util
+from DLSite_Cache import DLSite_Cache
+from DLSite_RateLimit import AIMDScheduler, DLSite_RateLimiter
+from DLSite_Transport import DLSite_Transport
+
+
+class RecordingScheduler(AIMDScheduler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.statuses = []
+
+    def record(self, status, latency):
+        self.statuses.append(status)
+        super().record(status, latency)
+
+
+def test_each_retry_is_rate_limited_and_recorded(stub_server, monkeypatch):
+    stub_server.routes["/busy"] = lambda request: (429, {}, b"busy")
+    scheduler = RecordingScheduler()
+    rate_limiter = DLSite_RateLimiter(budgets={"other": 1000.0}, scheduler=scheduler)
+    transport = DLSite_Transport(retries=3, backoff_factor=0, rate_limiter=rate_limiter)
+    bucket = rate_limiter.get_bucket(stub_server.base_url + "/busy")
+    acquired = []
+    acquire = bucket.acquire
+    monkeypatch.setattr(bucket, "acquire", lambda *args: acquired.append(acquire(*args)))
+
+    resp = transport.request("GET", stub_server.base_url + "/busy")
+
+    assert resp.status_code == 429
+    assert len(stub_server.get_requests("/busy")) == 4
+    assert scheduler.statuses == [429] * 4
+    assert len(acquired) == 4
+
+
+def test_retry_without_rate_limiter(stub_server):
+    statuses = iter([503, 503, 200])
+    stub_server.routes["/flaky"] = lambda request: (next(statuses), {}, b"ok")
+    transport = DLSite_Transport(retries=3, backoff_factor=0)
+
+    resp = transport.request("GET", stub_server.base_url + "/flaky")
+
+    assert resp.status_code == 200
+    assert len(stub_server.get_requests("/flaky")) == 3
+
+
+@pytest.mark.parametrize("rate_limited", [False, True])
+def test_retry_after_wait_is_capped(stub_server, rate_limited):
+    statuses = iter([503, 200])
+    stub_server.routes["/busy"] = lambda request: (
+        next(statuses),
+        {"Retry-After": "3600"},
+        b"ok",
+    )
+    rate_limiter = DLSite_RateLimiter(budgets={"other": 1000.0}) if rate_limited else None
+    transport = DLSite_Transport(retries=1, max_retry_wait=0.1, rate_limiter=rate_limiter)
+
+    start = time.monotonic()
+    resp = transport.request("GET", stub_server.base_url + "/busy")
+
+    assert resp.status_code == 200
+    assert time.monotonic() - start < 5.0
+
+
+def test_budget_wait_does_not_hold_scheduler_slot():
+    rate_limiter = DLSite_RateLimiter(
+        budgets={"maker": 1.0}, burst=1.0, scheduler=AIMDScheduler(initial=1)
+    )
+    maker_url = "https://www.dlsite.com/maniax/circle/profile/=/maker_id/RG12345.html"
+    rate_limiter.get_bucket(maker_url).reserve()
+
+    def request_maker():
+        with rate_limiter.slot(maker_url):
+            pass
+
+    waiting = threading.Thread(target=request_maker)
+    waiting.start()
+    time.sleep(0.1)
+
+    start = time.monotonic()
+    with rate_limiter.slot("https://www.dlsite.com/maniax/work/=/product_id/RJ123456"):
+        elapsed = time.monotonic() - start
+    waiting.join()
+
+    assert elapsed < 0.5
+
+
+WORK_PATH = "/maniax/work/=/product_id/RJ100001"
+INFO_PATH = "/maniax/product/info/ajax"
+
+
+def _cached_route(body: bytes, etag: str = '"v1"', last_modified: str = ""):
+    def handler(request):
+        if etag and request.headers.get("If-None-Match") == etag:
+            return 304, {}, b""
+        if last_modified and request.headers.get("If-Modified-Since") == last_modified:
+            return 304, {}, b""
+        headers = {"Content-Type": "text/html; charset=utf-8"}
+        if etag:
+            headers["ETag"] = etag
+        if last_modified:
+            headers["Last-Modified"] = last_modified
+        return 200, headers, body
+
+    return handler
+
+
+def _cache_transport(tmp_path, html_ttl: float, json_ttl: float) -> DLSite_Transport:
+    cache = DLSite_Cache(
+        str(tmp_path / "cache.sqlite"), html_ttl=html_ttl, json_ttl=json_ttl
+    )
+    return DLSite_Transport(retries=0, cache=cache)
+
+
+def test_cache_fresh_hit(stub_server, tmp_path):
+    stub_server.routes[WORK_PATH] = _cached_route(b"<html>page</html>")
+    transport = _cache_transport(tmp_path, html_ttl=3600, json_ttl=3600)
+    url = stub_server.base_url + WORK_PATH
+
+    first = transport.request("GET", url)
+    second = transport.request("GET", url)
+
+    assert len(stub_server.requests) == 1
+    assert second.status_code == 200
+    assert second.content == first.content == b"<html>page</html>"
+    assert second.headers["ETag"] == '"v1"'
+
+
+@pytest.mark.parametrize(
+    "etag, last_modified, header",
+    [
+        ('"v1"', "", "If-None-Match"),
+        ("", "Wed, 10 Mar 2021 00:00:00 GMT", "If-Modified-Since"),
+    ],
+)
+def test_cache_revalidates_stale_entry(stub_server, tmp_path, etag, last_modified, header):
+    stub_server.routes[WORK_PATH] = _cached_route(b"<html>page</html>", etag, last_modified)
+    transport = _cache_transport(tmp_path, html_ttl=0, json_ttl=0)
+    url = stub_server.base_url + WORK_PATH
+    key = util.get_request_key("GET", url)
+
+    transport.request("GET", url)
+    fetched_at = transport.cache.get(key).fetched_at
+    resp = transport.request("GET", url)
+
+    assert len(stub_server.requests) == 2
+    assert header in stub_server.requests[1].headers
+    assert resp.status_code == 200
+    assert resp.content == b"<html>page</html>"
+    assert transport.cache.get(key).fetched_at > fetched_at
+
+
+def test_cache_html_and_json_ttl(stub_server, tmp_path):
+    stub_server.routes[WORK_PATH] = _cached_route(b"<html>page</html>", etag="")
+    stub_server.routes[INFO_PATH] = _cached_route(b"{}", etag="")
+    transport = _cache_transport(tmp_path, html_ttl=3600, json_ttl=0)
+
+    for _ in range(2):
+        transport.request("GET", stub_server.base_url + WORK_PATH)
+        transport.request(
+            "GET", stub_server.base_url + INFO_PATH, params={"product_id": "RJ100001"}
+        )
+
+    assert len(stub_server.get_requests(WORK_PATH)) == 1
+    assert len(stub_server.get_requests(INFO_PATH)) == 2
@@ -1,25 +1,48 @@
 import re
-from typing import List, Tuple, Union
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable, List, Tuple, Union
 
 REGEX_PREFIX = {"RJ": r"[Rr][Jj][0-9]{6,8}", "RG": r"[Rr][Gg][0-9]{5}"}
 
+# Precompiled once, used on every id, size and date parsed
+_REGEX_ID = {p: re.compile(pattern) for p, pattern in REGEX_PREFIX.items()}
+_REGEX_ID_FULL = {p: re.compile(r"^" + pattern + r"$") for p, pattern in REGEX_PREFIX.items()}
+_REGEX_HUMAN_SIZE = re.compile(
+    r"([\d]+\.?[\d]*) ?([{}]I?B?)".format("".join(["K", "M", "G", "T"]))
+)
+_REGEX_JP_DATE = re.compile(r"(\d{4})年(\d{2})月(\d{2})日")
+_REGEX_ISO_DATE = re.compile(r"(\d{4})-?(\d{2})?-?(\d{2})?")
 
-def get_id_code(text: str, id_prefix: str) -> Union[str, None]:
-    """
-    Return last non-overlapping `id_code` of a provided `id_prefix` in `text`, or `None` if not found.
-    """
+
+def _check_id_prefix(id_prefix: str) -> str:
     id_prefix = id_prefix.upper()
     if id_prefix not in REGEX_PREFIX:
         _SEP = '", "'
         raise ValueError(
             f'Supported id prefix is "{_SEP.join([p for p in REGEX_PREFIX])}", but got {id_prefix}'
         )
-    pattern = REGEX_PREFIX[id_prefix]
-    id_code: List[str] = re.findall(pattern, text)
+    return id_prefix
+
+
+def get_id_code(text: str, id_prefix: str) -> Union[str, None]:
+    """
+    Return last non-overlapping `id_code` of a provided `id_prefix` in `text`, or `None` if not found.
+    """
+    id_prefix = _check_id_prefix(id_prefix)
+    id_code: List[str] = _REGEX_ID[id_prefix].findall(text)
     if id_code:
         return id_code[-1].upper()
 
 
+def find_id_codes(text: str, id_prefix: str) -> List[str]:
+    """
+    Return every non-overlapping `id_code` of a provided `id_prefix` in `text`.
+    """
+    id_prefix = _check_id_prefix(id_prefix)
+    return [id_code.upper() for id_code in _REGEX_ID[id_prefix].findall(text)]
+
+
 def get_id_num(text: str, id_prefix: str) -> Union[int, None]:
     """
     Return last non-overlapping `id` of a provided `id_prefix` with out `id_prefix` in `text`, or `None` if not found.
@@ -30,14 +53,24 @@ def get_id_num(text: str, id_prefix: str) -> Union[int, None]:
         return int(id_code.replace(id_prefix, ""))
 
 
+def get_id_code_from_num(id_num: int, id_prefix: str) -> str:
+    """
+    Return `id_code` of `id_num`, RJ ids below 1000000 have 6 digits and newer ones 8 digits.
+    """
+    id_prefix = _check_id_prefix(id_prefix)
+    if id_prefix == "RG":
+        return f"RG{id_num:05d}"
+    return f"RJ{id_num:06d}" if id_num < 1000000 else f"RJ{id_num:08d}"
+
+
 def is_id_code(id_code: str, id_prefix: str = None) -> bool:
     """
     Check `id_code` is proper format of all supported format or specific format if `id_perfix` is provided
     """
     if id_prefix:
         return is_id_code_prefix(id_code, id_prefix)
-    for pattern in REGEX_PREFIX.values():
-        if re.match(r"^" + pattern + r"$", id_code):
+    for pattern in _REGEX_ID_FULL.values():
+        if pattern.match(id_code):
             return True
     return False
 
@@ -46,13 +79,8 @@ def is_id_code_prefix(id_code: str, id_prefix: str) -> bool:
     """
     Check `id_code` is proper format of provided `id_perfix`
     """
-    id_prefix = id_prefix.upper()
-    if id_prefix not in REGEX_PREFIX:
-        _SEP = '", "'
-        raise ValueError(
-            f'Supported id prefix is "{_SEP.join([p for p in REGEX_PREFIX])}", but got {id_prefix}'
-        )
-    return True if re.match(r"^" + REGEX_PREFIX[id_prefix] + r"$", id_code) else False
+    id_prefix = _check_id_prefix(id_prefix)
+    return True if _REGEX_ID_FULL[id_prefix].match(id_code) else False
 
 
 def get_humanread_byte(
@@ -84,10 +112,7 @@ def get_humanread_str_byte(
 def get_byte_humanread_str(
     humanread_str: str, step: int = 1024, step_prefix: List[str] = ["K", "M", "G", "T"]
 ) -> int:
-    REGEX_HUMAN_SIZE = r"([\d]+\.?[\d]*) ?([{}]I?B?)".format(
-        "".join(["K", "M", "G", "T"])
-    )
-    match = re.findall(REGEX_HUMAN_SIZE, humanread_str.upper())
+    match = _REGEX_HUMAN_SIZE.findall(humanread_str.upper())
     if not match:
         return -1
 
@@ -99,3 +124,77 @@ def get_byte_humanread_str(
             return round(size * (step ** power))
 
     return round(size)
+
+
+def parse_ids(texts: Iterable[str], id_prefix: str) -> List[Union[str, None]]:
+    """
+    Return `get_id_code` of every text in `texts`.
+    """
+    findall = _REGEX_ID[_check_id_prefix(id_prefix)].findall
+    id_codes = []
+    for text in texts:
+        id_code = findall(text)
+        id_codes.append(id_code[-1].upper() if id_code else None)
+    return id_codes
+
+
+def parse_sizes(
+    humanread_strs: Iterable[str],
+    step: int = 1024,
+    step_prefix: List[str] = ["K", "M", "G", "T"],
+) -> List[int]:
+    """
+    Return `get_byte_humanread_str` of every string in `humanread_strs`.
+    """
+    return [get_byte_humanread_str(s, step, step_prefix) for s in humanread_strs]
+
+
+@lru_cache(maxsize=8192)
+def get_date(date_str: str) -> Union[datetime, None]:
+    """
+    Return date of `date_str` starting with `YYYY年MM月DD日`, or `None` if not matched.
+    """
+    match = _REGEX_JP_DATE.match(date_str)
+    if not match:
+        return None
+    year, month, day = match.groups()
+    return datetime(year=int(year), month=int(month or 1), day=int(day or 1))
+
+
+@lru_cache(maxsize=8192)
+def get_iso_date(date_str: str) -> Union[datetime, None]:
+    """
+    Return date of `date_str` starting with `YYYY-MM-DD`, `YYYY-MM` or `YYYY`, or `None` if not matched.
+    """
+    match = _REGEX_ISO_DATE.match(date_str)
+    if not match:
+        return None
+    year, month, day = match.groups()
+    return datetime(year=int(year), month=int(month or 1), day=int(day or 1))
+
+
+URL_CLASSES = {
+    "work": "/work/=/product_id/",
+    "info": "/product/info/ajax",
+    "revision": "/product/revision/ajax",
+    "maker": "/circle/profile/",
+    "image": "img.dlsite.jp/",
+}
+
+
+def get_url_class(url: str) -> str:
+    """
+    Return which kind of DLsite endpoint `url` is, one of `URL_CLASSES` keys or `"other"`.
+    """
+    for url_class, path in URL_CLASSES.items():
+        if path in url:
+            return url_class
+    return "other"
+
+
+def get_request_key(method: str, url: str, params: dict = {}) -> str:
+    """
+    Return stable key of a request, `params` order does not matter.
+    """
+    query = "&".join(f"{k}={params[k]}" for k in sorted(params))
+    return f"{method.upper()} {url}?{query}" if query else f"{method.upper()} {url}"